@@ -0,0 +1,194 @@
+"""Multi-timeframe data cube.
+
+``build_cube`` aligns every symbol and timeframe on the bars of the
+finest timeframe with as-of joins, and stores the result in one
+memory-mapped array of shape (bar, symbol, timeframe, field). At a bar,
+a timeframe's values are those of its last bar closed by the close of
+that bar, so a 4h candle is only seen once it is complete, and a
+strategy reads any higher timeframe context with a single index:
+
+    cube = MultiTimeframeCube("data/cube")
+    rsi_4h = cube.get(bar, "BTCUSDT", "4h", "rsi")
+
+    python -m backtest.cube data/cube --timeframes 15m 1h 4h --fields close rsi
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtest.engine import DATA_DIR, IndicatorCache
+from scripts import indicators
+
+MANIFEST = "manifest.json"
+VALUES = "values.npy"
+TIMESTAMPS = "timestamps.npy"
+
+DEFAULT_FIELDS = indicators.INPUT_COLUMNS + indicators.INDICATOR_COLUMNS
+
+
+def timeframe_duration(timeframe):
+    """Bar duration of a timeframe such as "15m", "1h" or "4h" """
+    return pd.Timedelta(timeframe.replace("m", "min"))
+
+
+def raw_datasets(data_dir=DATA_DIR):
+    """{symbol: [timeframe, ...]} of the raw files, finest timeframe first"""
+    datasets = {}
+    for file in sorted(os.listdir(os.path.join(data_dir, "raw"))):
+        if file.endswith(".csv"):
+            symbol, timeframe = file[: -len(".csv")].rsplit("_", 1)
+            datasets.setdefault(symbol, []).append(timeframe)
+    return {
+        symbol: sorted(timeframes, key=timeframe_duration)
+        for symbol, timeframes in datasets.items()
+    }
+
+
+def build_cube(
+    root,
+    symbols=None,
+    timeframes=None,
+    fields=DEFAULT_FIELDS,
+    data_dir=DATA_DIR,
+    dtype=np.float64,
+    cache=None,
+):
+    """Build the cube of ``symbols`` x ``timeframes`` x ``fields`` under ``root``.
+
+    The bars are the union of the finest timeframe's bars over the
+    symbols. Fields are raw columns or registry indicators, computed
+    through ``cache`` (an IndicatorCache). Values are NaN until a
+    timeframe's first bar has closed, and after a symbol's last bar they
+    keep its last values.
+
+    Returns:
+        The MultiTimeframeCube
+    """
+    available = raw_datasets(data_dir)
+    symbols = sorted(available) if symbols is None else list(symbols)
+    if timeframes is None:
+        timeframes = sorted(
+            set.intersection(*(set(available[symbol]) for symbol in symbols)),
+            key=timeframe_duration,
+        )
+    timeframes = sorted(timeframes, key=timeframe_duration)
+    fields = list(fields)
+    cache = IndicatorCache(data_dir) if cache is None else cache
+    names = [field for field in fields if field not in indicators.INPUT_COLUMNS]
+    durations = {timeframe: timeframe_duration(timeframe) for timeframe in timeframes}
+
+    # Close time of every bar, from which its values can be used
+    frames = {}
+    for symbol in symbols:
+        for timeframe in timeframes:
+            df = cache.load(symbol, timeframe, names)
+            closes = df["timestamp"] + durations[timeframe]
+            frames[symbol, timeframe] = (
+                closes.to_numpy("datetime64[ns]"),
+                df[fields].to_numpy(np.float64),
+            )
+    base = timeframes[0]
+    bar_closes = np.unique(np.concatenate([frames[s, base][0] for s in symbols]))
+
+    os.makedirs(root, exist_ok=True)
+    shape = (len(bar_closes), len(symbols), len(timeframes), len(fields))
+    values = np.lib.format.open_memmap(
+        os.path.join(root, VALUES), mode="w+", dtype=dtype, shape=shape
+    )
+    values[:] = np.nan
+    for s, symbol in enumerate(symbols):
+        for t, timeframe in enumerate(timeframes):
+            closes, rows = frames[symbol, timeframe]
+            # As-of join: the last bar closed by the close of each base bar
+            last = np.searchsorted(closes, bar_closes, side="right") - 1
+            known = last >= 0
+            values[known, s, t, :] = rows[last[known]]
+    values.flush()
+    del values
+
+    np.save(os.path.join(root, TIMESTAMPS), bar_closes - durations[base])
+    manifest = {
+        "symbols": symbols,
+        "timeframes": timeframes,
+        "fields": fields,
+        "rows": len(bar_closes),
+        "dtype": np.dtype(dtype).str,
+    }
+    with open(os.path.join(root, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return MultiTimeframeCube(root)
+
+
+class MultiTimeframeCube:
+    """Read-only, memory-mapped view of a cube built by ``build_cube``.
+
+    ``values[bar, symbol, timeframe, field]`` is indexed by the position
+    of the names in ``symbols``, ``timeframes`` and ``fields``; ``get``
+    does the lookup by name. ``timestamps`` are the open times of the bars
+    of the finest timeframe.
+    """
+
+    def __init__(self, root):
+        with open(os.path.join(root, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.symbols = manifest["symbols"]
+        self.timeframes = manifest["timeframes"]
+        self.fields = manifest["fields"]
+        self.values = np.load(os.path.join(root, VALUES), mmap_mode="r")
+        self.timestamps = pd.to_datetime(np.load(os.path.join(root, TIMESTAMPS)))
+        self._symbols = {name: i for i, name in enumerate(self.symbols)}
+        self._timeframes = {name: i for i, name in enumerate(self.timeframes)}
+        self._fields = {name: i for i, name in enumerate(self.fields)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def index(self, symbol, timeframe, field):
+        return self._symbols[symbol], self._timeframes[timeframe], self._fields[field]
+
+    def get(self, bar, symbol, timeframe, field):
+        """Value of ``field`` of ``timeframe`` as known at the close of ``bar``"""
+        return self.values[(bar,) + self.index(symbol, timeframe, field)]
+
+    def frame(self, symbol, timeframes=None, fields=None):
+        """DataFrame of a symbol on the cube's bars, e.g. for ``run_backtest``.
+
+        Columns are ``timestamp``, the fields of the finest timeframe under
+        their own names and those of the other ``timeframes`` as
+        ``<field>_<timeframe>``.
+        """
+        timeframes = self.timeframes if timeframes is None else timeframes
+        fields = self.fields if fields is None else fields
+        s = self._symbols[symbol]
+        columns = {"timestamp": self.timestamps}
+        for timeframe in timeframes:
+            t = self._timeframes[timeframe]
+            suffix = "" if timeframe == self.timeframes[0] else f"_{timeframe}"
+            for field in fields:
+                columns[f"{field}{suffix}"] = self.values[:, s, t, self._fields[field]]
+        return pd.DataFrame(columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a multi-timeframe data cube")
+    parser.add_argument("root", help="Output directory, e.g. data/cube")
+    parser.add_argument("--symbols", nargs="+")
+    parser.add_argument("--timeframes", nargs="+")
+    parser.add_argument("--fields", nargs="+", default=DEFAULT_FIELDS)
+    parser.add_argument("--dtype", default="float64", choices=["float32", "float64"])
+    args = parser.parse_args()
+    cube = build_cube(
+        args.root,
+        args.symbols,
+        args.timeframes,
+        args.fields,
+        dtype=np.dtype(args.dtype),
+    )
+    print(
+        f"{len(cube)} bars x {len(cube.symbols)} symbols x {len(cube.timeframes)} "
+        f"timeframes x {len(cube.fields)} fields"
+    )
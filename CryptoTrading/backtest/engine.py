@@ -1,3 +1,312 @@
-def run_backtest(strategy, data):
-    # TODO: implement simulation loop
-    pass
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from scripts import indicators, storage
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PROJECT_DIR, "data")
+
+# Binance spot taker fee, and the slippage applied to every fill price
+FEE = 0.001
+SLIPPAGE = 0.0005
+
+# Columns every backtest reads, whatever the strategy uses
+PRICE_COLUMNS = ["open", "close"]
+
+
+def load_data(symbol, timeframe, data_dir=DATA_DIR, columns=None):
+    """Load the processed indicator data of a symbol/timeframe, e.g. BTCUSDT/1h.
+
+    Reads the memory-mapped column store of ``data_dir/columns`` when it
+    has the dataset (see scripts/storage.py), else the processed CSV, whose
+    timestamps are taken from the raw file with the same rows.
+
+    Args:
+        columns: Only load these columns, besides the timestamps and the
+            ``PRICE_COLUMNS`` (default: all)
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(PRICE_COLUMNS + list(columns)))
+    timestamp = storage.TIMESTAMP_COLUMN
+    store_dir = os.path.join(data_dir, "columns")
+
+    if storage.has_dataset(store_dir, symbol, timeframe):
+        stored = storage.read_manifest(
+            os.path.join(store_dir, storage.dataset_name(symbol, timeframe))
+        )["columns"]
+        wanted = list(stored) if columns is None else columns
+        if timestamp in stored and timestamp not in wanted:
+            wanted = [timestamp] + wanted
+        df = storage.load_frame(store_dir, symbol, timeframe, wanted)
+        timestamps = df.pop(timestamp) if timestamp in df else None
+    else:
+        name = f"{symbol}_{timeframe}.csv"
+        df = pd.read_csv(os.path.join(data_dir, "processed", name), usecols=columns)
+        raw_file = os.path.join(data_dir, "raw", name)
+        timestamps = None
+        if os.path.exists(raw_file):
+            timestamps = pd.read_csv(raw_file, usecols=[timestamp])[timestamp]
+            if len(timestamps) != len(df):
+                timestamps = None
+
+    if timestamps is not None:
+        df.insert(0, "timestamp", pd.to_datetime(np.asarray(timestamps), unit="ms"))
+    return df
+
+
+def available_datasets(data_dir=DATA_DIR):
+    """(symbol, timeframe) of every processed file or stored dataset"""
+    datasets = set()
+    processed_dir = os.path.join(data_dir, "processed")
+    if os.path.isdir(processed_dir):
+        for file in os.listdir(processed_dir):
+            if file.endswith(".csv"):
+                symbol, timeframe = file[: -len(".csv")].rsplit("_", 1)
+                datasets.add((symbol, timeframe))
+    stored = storage.list_datasets(os.path.join(data_dir, "columns"))
+    datasets.update(zip(stored["symbol"], stored["timeframe"]))
+    return sorted(datasets)
+
+
+def load_raw(symbol, timeframe, data_dir=DATA_DIR):
+    """Timestamps and OHLCV of a symbol/timeframe, from the raw column store
+    (``data_dir/columns/raw``) or else the raw CSV"""
+    columns = [storage.TIMESTAMP_COLUMN] + indicators.INPUT_COLUMNS
+    store_dir = os.path.join(data_dir, "columns", "raw")
+    if storage.has_dataset(store_dir, symbol, timeframe):
+        df = storage.load_frame(store_dir, symbol, timeframe, columns)
+    else:
+        name = f"{symbol}_{timeframe}.csv"
+        df = pd.read_csv(os.path.join(data_dir, "raw", name), usecols=columns)
+    timestamps = pd.to_datetime(df.pop(storage.TIMESTAMP_COLUMN).to_numpy(), unit="ms")
+    df.insert(0, "timestamp", timestamps)
+    return df
+
+
+class IndicatorCache:
+    """Registry indicators (scripts/indicators.py) computed on demand.
+
+    Keeps the raw data of every dataset loaded and each indicator and
+    intermediate computed on it, so that strategies only pay for the
+    indicators they request, and those they share, e.g. the EMA under
+    both ``macd`` and ``ema_long``, are computed once per dataset.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.datasets = {}
+
+    def load(self, symbol, timeframe, names):
+        """Raw data of a symbol/timeframe with the ``names`` indicators"""
+        key = (symbol, timeframe)
+        if key not in self.datasets:
+            self.datasets[key] = (load_raw(symbol, timeframe, self.data_dir), {})
+        raw, computed = self.datasets[key]
+        return pd.concat([raw, indicators.compute(raw, names, computed)], axis=1)
+
+
+class Portfolio:
+    """Long-only spot account of cash and units of one asset.
+
+    ``rebalance`` is the single fill function of both execution paths of
+    ``run_backtest``: it trades towards a target position, the fraction of
+    equity held in the asset, at a price worsened by ``slippage`` and pays
+    ``fee`` on the traded notional.
+    """
+
+    def __init__(self, cash=10_000.0, fee=FEE, slippage=SLIPPAGE):
+        self.cash = cash
+        self.units = 0.0
+        self.fee = fee
+        self.slippage = slippage
+        self.fills = []
+
+    def equity(self, price):
+        return self.cash + self.units * price
+
+    def rebalance(self, bar, price, target):
+        """Trade at ``price`` so that ``target`` of equity is in the asset.
+
+        Buys are capped by the cash available and sells by the units held.
+
+        Returns:
+            The fill, or None if nothing was traded
+        """
+        target = min(max(target, 0.0), 1.0)
+        delta = (target * self.equity(price) - self.units * price) / price
+        if delta > 0:
+            fill_price = price * (1 + self.slippage)
+            qty = min(delta, self.cash / (fill_price * (1 + self.fee)))
+            side = "buy"
+        else:
+            fill_price = price * (1 - self.slippage)
+            qty = min(-delta, self.units)
+            side = "sell"
+        if qty <= 0:
+            return None
+
+        notional = qty * fill_price
+        fee = notional * self.fee
+        if side == "buy":
+            self.cash -= notional + fee
+            self.units += qty
+        else:
+            self.cash += notional - fee
+            self.units -= qty
+        fill = {
+            "bar": bar,
+            "side": side,
+            "qty": qty,
+            "price": fill_price,
+            "fee": fee,
+            "cash": self.cash,
+            "units": self.units,
+        }
+        self.fills.append(fill)
+        return fill
+
+
+@dataclass
+class BacktestResult:
+    fills: pd.DataFrame
+    equity: pd.Series
+    stats: dict = field(default_factory=dict)
+
+
+def equity_curve(close, fills, cash):
+    """Equity at every close, with the holdings after the fills so far"""
+    bars = np.array([fill["bar"] for fill in fills], dtype=np.int64)
+    cash_after = np.array([cash] + [fill["cash"] for fill in fills])
+    units_after = np.array([0.0] + [fill["units"] for fill in fills])
+    held = np.searchsorted(bars, np.arange(len(close)), side="right")
+    return cash_after[held] + units_after[held] * close
+
+
+def _result(data, portfolio, cash):
+    fills = pd.DataFrame(
+        portfolio.fills,
+        columns=["bar", "side", "qty", "price", "fee", "cash", "units"],
+    )
+    if "timestamp" in data:
+        fills.insert(1, "timestamp", data["timestamp"].to_numpy()[fills["bar"]])
+    equity = pd.Series(
+        equity_curve(data["close"].to_numpy(np.float64), portfolio.fills, cash),
+        index=data.index,
+        name="equity",
+    )
+    final = equity.iloc[-1] if len(equity) else cash
+    drawdown = equity / equity.cummax() - 1
+    stats = {
+        "final_equity": float(final),
+        "return": float(final / cash - 1),
+        "max_drawdown": float(drawdown.min()) if len(equity) else 0.0,
+        "trades": len(fills),
+        "fees": float(fills["fee"].sum()),
+    }
+    return BacktestResult(fills, equity, stats)
+
+
+def _run_vectorized(strategy, data, portfolio):
+    targets = np.asarray(strategy.signals(data), dtype=np.float64)
+    if len(targets) != len(data):
+        raise ValueError(f"signals returned {len(targets)} values for {len(data)} bars")
+    # NaN holds the previous target, and the account starts flat
+    targets = pd.Series(targets).ffill().fillna(0.0).to_numpy()
+    previous = np.concatenate(([0.0], targets[:-1]))
+    open_prices = data["open"].to_numpy(np.float64)
+
+    # Only the bars where the target changes trade, filled at the next open
+    for t in np.flatnonzero(targets[:-1] != previous[:-1]):
+        portfolio.rebalance(int(t) + 1, open_prices[t + 1], targets[t])
+
+
+def _run_event_driven(strategy, data, portfolio):
+    columns = list(data.columns)
+    values = data.to_numpy(dtype=object)
+    open_prices = data["open"].to_numpy(np.float64)
+    target = 0.0
+
+    for t in range(len(data) - 1):
+        snapshot = dict(zip(columns, values[t].tolist()))
+        snapshot.update(bar=t, cash=portfolio.cash, units=portfolio.units)
+        decision = strategy.on_tick(snapshot) or {}
+        position = decision.get("position")
+        if position is None or np.isnan(position) or position == target:
+            continue
+        target = position
+        portfolio.rebalance(t + 1, open_prices[t + 1], target)
+
+
+def run_backtest(
+    strategy, data, cash=10_000.0, fee=FEE, slippage=SLIPPAGE, mode="auto"
+):
+    """Backtest a long-only strategy on one symbol/timeframe.
+
+    A strategy decides on the close of a bar the target position, the
+    fraction of equity to hold in the asset (0 is flat, 1 fully invested),
+    and it is filled at the open of the next bar. Either:
+
+    - ``signals(data)`` returns the targets of all bars as an array, NaN
+      keeping the previous one (vectorized path), or
+    - ``on_tick(market_snapshot)`` is called bar by bar with the bar's
+      row plus ``bar``, ``cash`` and ``units``, and returns
+      ``{"position": target}``, or ``{}`` to hold (event-driven path).
+
+    Both paths trade only when the target changes, through
+    ``Portfolio.rebalance``, so the same targets give identical fills.
+
+    A strategy may list the processed data columns it uses in a
+    ``columns`` attribute, for ``backtest_all`` to load only those, or the
+    registry indicators it needs in ``indicators``, to have them computed
+    from the raw data by an ``IndicatorCache``.
+
+    Args:
+        data: DataFrame from ``load_data``, needs ``open`` and ``close``
+        mode: "vectorized", "event", or "auto" to use ``signals`` when the
+            strategy has it
+
+    Returns:
+        BacktestResult with the fills, the equity at every close and the
+        summary stats
+    """
+    if mode == "auto":
+        mode = "vectorized" if hasattr(strategy, "signals") else "event"
+    if mode not in ("vectorized", "event"):
+        raise ValueError(f"Unknown mode {mode!r}, expected vectorized or event")
+
+    data = data.reset_index(drop=True)
+    portfolio = Portfolio(cash, fee, slippage)
+    if mode == "vectorized":
+        _run_vectorized(strategy, data, portfolio)
+    else:
+        _run_event_driven(strategy, data, portfolio)
+    return _result(data, portfolio, cash)
+
+
+def backtest_all(strategy_cls, config=None, data_dir=DATA_DIR, cache=None, **kwargs):
+    """Backtest a fresh ``strategy_cls(config)`` on every symbol/timeframe.
+
+    Args:
+        cache: IndicatorCache serving strategies with ``indicators``; pass
+            the same one to several calls to share what they compute
+
+    Returns:
+        DataFrame of the stats, indexed by (symbol, timeframe)
+    """
+    cache = IndicatorCache(data_dir) if cache is None else cache
+    rows = {}
+    for symbol, timeframe in available_datasets(data_dir):
+        strategy = strategy_cls(config)
+        if hasattr(strategy, "indicators"):
+            data = cache.load(symbol, timeframe, strategy.indicators)
+        else:
+            columns = getattr(strategy, "columns", None)
+            data = load_data(symbol, timeframe, data_dir, columns)
+        result = run_backtest(strategy, data, **kwargs)
+        rows[(symbol, timeframe)] = result.stats
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table.index.names = ["symbol", "timeframe"]
+    return table
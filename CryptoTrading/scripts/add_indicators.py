@@ -1,75 +1,203 @@
-import pandas as pd
-import pandas_ta as ta
+import argparse
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+import storage
+from indicators import INPUT_COLUMNS, IndicatorPipeline
 
 # Define the input and output directories
 input_dir = "data/raw"
 output_dir = "data/processed"
+# Columnar copy of the processed data, see storage.py
+store_dir = "data/columns"
+
+# Output formats: the processed CSVs and/or the column store
+FORMATS = {"csv": ["csv"], "npy": ["npy"], "both": ["csv", "npy"]}
+
+# Indicator state of every processed file, to continue on appended rows
+STATE_DIR = ".state"
+
 
-# OFFSETS
-MACD_LENGTH = 26
-ADX_LENGTH = 14
-BBANDS_LENGTH = 20
-
-
-# Loop through all files in the input directory
-for file in os.listdir(input_dir):
-    # Check if the file is a CSV file
-    if file.endswith(".csv"):
-        # Load the CSV file
-        df = pd.read_csv(
-            os.path.join(input_dir, file),
-            usecols=["low", "high", "open", "close", "volume"],
-        )
-
-        # Calculate the technical indicators
-        # MACD
-        macd_values = ta.macd(df["close"], fast=12, slow=26, signal=9)
-        df.loc[MACD_LENGTH:, "macd"] = macd_values["MACD_12_26_9"].iloc[MACD_LENGTH:]
-        df.loc[MACD_LENGTH:, "macd_hist"] = macd_values["MACDh_12_26_9"].iloc[
-            MACD_LENGTH:
-        ]
-        df.loc[MACD_LENGTH:, "macd_signal"] = macd_values["MACDs_12_26_9"].iloc[
-            MACD_LENGTH:
-        ]
-
-        # ADX
-        adx_values = ta.adx(df["high"], df["low"], df["close"], length=14)
-        df.loc[ADX_LENGTH:, "adx"] = adx_values["ADX_14"].iloc[ADX_LENGTH:]
-
-        # BBANDS
-        bbands_values = ta.bbands(df["close"], length=20, std=2)
-        df.loc[BBANDS_LENGTH:, "bb_upper"] = bbands_values["BBU_20_2.0"].iloc[
-            BBANDS_LENGTH:
-        ]
-        df.loc[BBANDS_LENGTH:, "bb_middle"] = bbands_values["BBM_20_2.0"].iloc[
-            BBANDS_LENGTH:
-        ]
-        df.loc[BBANDS_LENGTH:, "bb_lower"] = bbands_values["BBL_20_2.0"].iloc[
-            BBANDS_LENGTH:
-        ]
-        df.loc[BBANDS_LENGTH:, "bb_width"] = bbands_values["BBB_20_2.0"].iloc[
-            BBANDS_LENGTH:
-        ]
-        df.loc[BBANDS_LENGTH:, "bb_percent"] = bbands_values["BBP_20_2.0"].iloc[
-            BBANDS_LENGTH:
-        ]
-        df["rsi"] = ta.rsi(df["close"], length=14)
-        # df["adx"] = ta.adx(df["high"], df["low"], df["close"], length=14)["ADX_14"]
-        # (
-        #     df["bb_lower"],
-        #     df["bb_middle"],
-        #     df["bb_upper"],
-        #     df["bb_width"],
-        #     df["bb_percent"],
-        # ) = ta.bbands(df["close"], length=20, std=2)
-
-        df["atr"] = ta.atr(df["high"], df["low"], df["close"], length=14)
-        df["ema_short"] = ta.ema(df["close"], length=9)
-        df["ema_long"] = ta.ema(df["close"], length=26)
-
-        # Save the updated dataframe to a new CSV file in the output directory
+def state_path(output_dir, file):
+    return os.path.join(output_dir, STATE_DIR, file.replace(".csv", ".json"))
+
+
+def _split_name(file):
+    return file[: -len(".csv")].rsplit("_", 1)
+
+
+def _output_sizes(file, output_dir, store_dir, formats):
+    """Size of each output of ``file``: CSV bytes and stored rows"""
+    sizes = {}
+    if "csv" in formats:
         output_file = os.path.join(output_dir, file)
-        df.to_csv(output_file, index=False)
+        if os.path.exists(output_file):
+            sizes["csv"] = os.path.getsize(output_file)
+    if "npy" in formats and storage.has_dataset(store_dir, *_split_name(file)):
+        path = os.path.join(store_dir, storage.dataset_name(*_split_name(file)))
+        sizes["npy"] = storage.read_manifest(path)["rows"]
+    return sizes
+
+
+def load_state(file, output_dir, store_dir, formats):
+    """Saved state of ``file``, or None if its outputs have to be rebuilt"""
+    path = state_path(output_dir, file)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        saved = json.load(f)
+    # An output is missing, was not written by the last run (the formats
+    # changed since), or was modified since, e.g. by an interrupted run
+    sizes = _output_sizes(file, output_dir, store_dir, formats)
+    for kind in formats:
+        if kind not in sizes or sizes[kind] != saved["outputs"].get(kind):
+            return None
+    return saved
+
+
+def save_state(file, output_dir, store_dir, formats, indicators, last_row):
+    path = state_path(output_dir, file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    saved = {
+        "outputs": _output_sizes(file, output_dir, store_dir, formats),
+        "last_row": last_row,
+        "indicators": indicators.get_state(),
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(saved, f)
+    os.replace(tmp, path)
+
+
+def process_file(
+    file,
+    input_dir=input_dir,
+    output_dir=output_dir,
+    full=False,
+    formats=("csv",),
+    store_dir=store_dir,
+    dtype=np.float64,
+):
+    """Add the indicators of the rows appended to ``file`` since the last run.
+
+    The indicators continue from the saved state, and the new rows are
+    appended to the outputs: the processed CSV and/or the column store
+    (with the bars' ``timestamp_open``, float columns as ``dtype``).
+    Without a usable state (first run, ``full``, or a raw file that was
+    rewritten rather than appended to) the whole file is processed again.
+
+    Returns:
+        (number of rows processed, whether the file was processed in full)
+    """
+    input_file = os.path.join(input_dir, file)
+    output_file = os.path.join(output_dir, file)
+    saved = None if full else load_state(file, output_dir, store_dir, formats)
+
+    def usecols(column):
+        return column in INPUT_COLUMNS or column == storage.TIMESTAMP_COLUMN
+
+    indicators = IndicatorPipeline()
+    # The registry changed since, so did the state its indicators need
+    if saved is not None and saved["indicators"].get("nodes", {}).keys() != (
+        indicators.nodes.keys()
+    ):
+        saved = None
+    if saved is not None:
+        rows = saved["indicators"]["rows"]
+        # Re-read the last processed row, to check that it did not change
+        df = pd.read_csv(input_file, usecols=usecols, skiprows=range(1, rows))
+        if rows and df[INPUT_COLUMNS].iloc[0].tolist() == saved["last_row"]:
+            df = df.iloc[1:]
+            indicators.set_state(saved["indicators"])
+        else:
+            saved = None
+    if saved is None:
+        df = pd.read_csv(input_file, usecols=usecols)
+
+    if saved is not None and df.empty:
+        return 0, False
+
+    processed = indicators.update(df)
+    if "csv" in formats:
+        if saved is None:
+            processed.to_csv(output_file, index=False)
+        else:
+            processed.to_csv(output_file, mode="a", header=False, index=False)
+    if "npy" in formats:
+        if storage.TIMESTAMP_COLUMN in df:
+            timestamps = df[storage.TIMESTAMP_COLUMN].to_numpy()
+            processed.insert(0, storage.TIMESTAMP_COLUMN, timestamps)
+        symbol, timeframe = _split_name(file)
+        if saved is None:
+            storage.write_columns(processed, store_dir, symbol, timeframe, dtype)
+        else:
+            storage.append_columns(processed, store_dir, symbol, timeframe)
+    if len(processed):
+        last_row = processed[INPUT_COLUMNS].iloc[-1].tolist()
+        save_state(file, output_dir, store_dir, formats, indicators, last_row)
+    return len(processed), saved is None
+
+
+def add_indicators(
+    input_dir=input_dir,
+    output_dir=output_dir,
+    workers=None,
+    full=False,
+    formats=("csv",),
+    store_dir=store_dir,
+    dtype=np.float64,
+):
+    """Process every CSV file of ``input_dir`` across a process pool"""
+    os.makedirs(output_dir, exist_ok=True)
+    files = sorted(file for file in os.listdir(input_dir) if file.endswith(".csv"))
+    process = partial(
+        process_file,
+        input_dir=input_dir,
+        output_dir=output_dir,
+        full=full,
+        formats=formats,
+        store_dir=store_dir,
+        dtype=dtype,
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file, (rows, rebuilt) in zip(files, executor.map(process, files)):
+            mode = "full" if rebuilt else "incremental"
+            print(f"Processed file: {file} ({rows} rows, {mode})")
+
 
-        print(f"Processed file: {file}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add technical indicators")
+    parser.add_argument("--input-dir", default=input_dir)
+    parser.add_argument("--output-dir", default=output_dir)
+    parser.add_argument("--store-dir", default=store_dir)
+    parser.add_argument(
+        "--format",
+        choices=list(FORMATS),
+        default="both",
+        help="Write the processed CSVs, the column store or both",
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=["float32", "float64"],
+        default="float64",
+        help="Float dtype of the column store",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--full", action="store_true", help="Recompute every file from scratch"
+    )
+    args = parser.parse_args()
+    add_indicators(
+        args.input_dir,
+        args.output_dir,
+        args.workers,
+        args.full,
+        FORMATS[args.format],
+        args.store_dir,
+        np.dtype(args.dtype),
+    )
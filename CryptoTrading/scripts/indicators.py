@@ -0,0 +1,432 @@
+"""Declarative registry of streaming indicators.
+
+Every indicator, and every intermediate series they share, is declared in
+``REGISTRY`` with the series it is computed from and its parameters, e.g.
+``macd`` from the ``ema_fast`` and ``ema_long`` EMAs, which ``ema_long``
+also is an output of. Requesting some indicators resolves the dependency
+graph and computes each node once (``compute``, or ``IndicatorPipeline``
+for data that arrives in chunks).
+
+Nodes keep the state they need to continue on appended rows (EMA values,
+Wilder accumulators, the last rows of a rolling window), so that
+processing a file in several chunks gives the same values as processing
+it at once. The formulas follow pandas_ta 0.3.14b: EMAs are seeded with
+the SMA of their first ``length`` values, and the Wilder moving average
+(RMA) is ``ewm(alpha=1 / length, min_periods=length)``.
+"""
+
+from dataclasses import dataclass, field
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+# OFFSETS: rows before these are left empty in the output
+MACD_LENGTH = 26
+ADX_LENGTH = 14
+BBANDS_LENGTH = 20
+
+INPUT_COLUMNS = ["low", "high", "open", "close", "volume"]
+
+# The indicators add_indicators.py writes, in this order
+INDICATOR_COLUMNS = [
+    "macd",
+    "macd_hist",
+    "macd_signal",
+    "adx",
+    "bb_upper",
+    "bb_middle",
+    "bb_lower",
+    "bb_width",
+    "bb_percent",
+    "rsi",
+    "atr",
+    "ema_short",
+    "ema_long",
+]
+
+
+class Ewm:
+    """``Series.ewm(...).mean()`` over values fed in chunks.
+
+    Same recursion as pandas (``ignore_na=False``), with the running
+    average, its weight and the number of observations as state.
+    """
+
+    def __init__(self, alpha, adjust=True, min_periods=0):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = np.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, values):
+        factor = 1.0 - self.alpha
+        new_wt = 1.0 if self.adjust else self.alpha
+        weighted, old_wt, nobs = self.weighted, self.old_wt, self.nobs
+        out = np.empty(len(values))
+        for i, cur in enumerate(np.asarray(values, dtype=np.float64).tolist()):
+            is_observation = cur == cur
+            nobs += is_observation
+            if weighted == weighted:
+                old_wt *= factor
+                if is_observation:
+                    if weighted != cur:
+                        weighted = old_wt * weighted + new_wt * cur
+                        weighted /= old_wt + new_wt
+                    old_wt = old_wt + new_wt if self.adjust else 1.0
+            elif is_observation:
+                weighted = cur
+            out[i] = weighted if nobs >= self.min_periods else np.nan
+        self.weighted, self.old_wt, self.nobs = weighted, old_wt, nobs
+        return out
+
+    def get_state(self):
+        return [self.weighted, self.old_wt, self.nobs]
+
+    def set_state(self, state):
+        self.weighted, self.old_wt, self.nobs = state
+
+
+class Rma(Ewm):
+    """Wilder's moving average"""
+
+    def __init__(self, length):
+        super().__init__(1.0 / length, adjust=True, min_periods=length)
+
+
+class Ema:
+    """pandas_ta ``ema``: the first value is the SMA of the first ``length``
+    values, then ``ewm(span=length, adjust=False)``. Leading NaNs are
+    skipped, as pandas_ta's MACD does for its signal line."""
+
+    def __init__(self, length):
+        self.length = length
+        self.seed = []
+        self.ewm = Ewm(2.0 / (length + 1), adjust=False)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).copy()
+        for i, value in enumerate(values):
+            if len(self.seed) == self.length:
+                break
+            if value != value and not self.seed:
+                continue
+            self.seed.append(value)
+            values[i] = np.mean(self.seed) if len(self.seed) == self.length else np.nan
+        return self.ewm.update(values)
+
+    def get_state(self):
+        return {"seed": self.seed, "ewm": self.ewm.get_state()}
+
+    def set_state(self, state):
+        self.seed = state["seed"]
+        self.ewm.set_state(state["ewm"])
+
+
+class Lag:
+    """The previous value of a series, NaN for the first row"""
+
+    def __init__(self):
+        self.last = np.nan
+
+    def update(self, values):
+        lagged = np.concatenate(([self.last], np.asarray(values, dtype=np.float64)))
+        self.last = float(lagged[-1])
+        return lagged[:-1]
+
+    def get_state(self):
+        return self.last
+
+    def set_state(self, state):
+        self.last = state
+
+
+class Rolling:
+    """``Series.rolling(length).<stat>(**kwargs)``, keeping the last
+    ``length - 1`` values for the next chunk"""
+
+    def __init__(self, length, stat, **kwargs):
+        self.length = length
+        self.stat = stat
+        self.kwargs = kwargs
+        self.window = []
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        window = pd.Series(self.window + values.tolist())
+        rolling = window.rolling(self.length, min_periods=self.length)
+        out = getattr(rolling, self.stat)(**self.kwargs).to_numpy()
+        self.window = window.tolist()[-(self.length - 1) :]
+        return out[len(out) - len(values) :]
+
+    def get_state(self):
+        return self.window
+
+    def set_state(self, state):
+        self.window = state
+
+
+class Formula:
+    """Row-wise function of the inputs, without state"""
+
+    def __init__(self, func):
+        self.func = func
+
+    def update(self, *inputs):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.func(*inputs)
+
+    def get_state(self):
+        return None
+
+    def set_state(self, state):
+        pass
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """A node of the registry.
+
+    Attributes:
+        inputs: Raw columns or other indicators it is computed from
+        factory: Called with ``params``, returns a fresh node whose
+            ``update(*inputs)`` takes the next rows of the inputs and
+            returns the indicator's
+        offset: Leading rows left empty in the output; dependents still
+            see their values
+    """
+
+    name: str
+    inputs: tuple
+    factory: object
+    offset: int = 0
+    params: dict = field(default_factory=dict)
+
+    def node(self):
+        return self.factory(**self.params)
+
+
+REGISTRY = {}
+
+
+def declare(name, inputs, factory, offset=0, registry=REGISTRY, **params):
+    """Add an indicator to ``registry``; ``params`` are passed to ``factory``"""
+    if name in registry or name in INPUT_COLUMNS:
+        raise ValueError(f"Indicator {name!r} is already declared")
+    registry[name] = Indicator(name, tuple(inputs), factory, offset, params)
+    return name
+
+
+def formula(func):
+    return partial(Formula, func)
+
+
+def _true_range(high, low, prev_close):
+    ranges = np.maximum(np.abs(high - prev_close), np.abs(prev_close - low))
+    true_range = np.fmax(high - low, ranges)
+    true_range[np.isnan(prev_close)] = np.nan
+    return true_range
+
+
+def _directional_move(move, opposite):
+    dm = np.where((move > opposite) & (move > 0), move, 0.0)
+    dm[np.isnan(move)] = np.nan
+    return dm
+
+
+def _dm_plus(high, prev_high, low, prev_low):
+    return _directional_move(high - prev_high, prev_low - low)
+
+
+def _dm_minus(high, prev_high, low, prev_low):
+    return _directional_move(prev_low - low, high - prev_high)
+
+
+def _directional_index(atr, dm_avg):
+    return 100 / atr * dm_avg
+
+
+def _dx(di_plus, di_minus):
+    return 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+
+
+def _bb_upper(middle, std):
+    return middle + 2 * std
+
+
+def _bb_lower(middle, std):
+    return middle - 2 * std
+
+
+def _bb_width(upper, lower, middle):
+    return 100 * (upper - lower) / middle
+
+
+def _bb_percent(close, upper, lower):
+    return (close - lower) / (upper - lower)
+
+
+def _gain(change):
+    return np.where(change < 0, 0.0, change)
+
+
+def _loss(change):
+    return np.where(change > 0, 0.0, change)
+
+
+def _rsi(gain_avg, loss_avg):
+    return 100 * gain_avg / (gain_avg + np.abs(loss_avg))
+
+
+declare("prev_high", ["high"], Lag)
+declare("prev_low", ["low"], Lag)
+declare("prev_close", ["close"], Lag)
+
+# EMAs, the slow EMA of MACD is ema_long
+declare("ema_short", ["close"], Ema, length=9)
+declare("ema_fast", ["close"], Ema, length=12)
+declare("ema_long", ["close"], Ema, length=26)
+
+# MACD 12/26/9
+declare("macd", ["ema_fast", "ema_long"], formula(np.subtract), MACD_LENGTH)
+declare("macd_signal", ["macd"], Ema, MACD_LENGTH, length=9)
+declare("macd_hist", ["macd", "macd_signal"], formula(np.subtract), MACD_LENGTH)
+
+# ATR 14, true range from the previous close
+declare("true_range", ["high", "low", "prev_close"], formula(_true_range))
+declare("atr", ["true_range"], Rma, length=14)
+
+# ADX 14
+directional_inputs = ["high", "prev_high", "low", "prev_low"]
+declare("dm_plus", directional_inputs, formula(_dm_plus))
+declare("dm_minus", directional_inputs, formula(_dm_minus))
+declare("dm_plus_avg", ["dm_plus"], Rma, length=ADX_LENGTH)
+declare("dm_minus_avg", ["dm_minus"], Rma, length=ADX_LENGTH)
+declare("di_plus", ["atr", "dm_plus_avg"], formula(_directional_index))
+declare("di_minus", ["atr", "dm_minus_avg"], formula(_directional_index))
+declare("dx", ["di_plus", "di_minus"], formula(_dx))
+declare("adx", ["dx"], Rma, ADX_LENGTH, length=ADX_LENGTH)
+
+# BBANDS 20/2
+declare(
+    "bb_middle", ["close"], Rolling, BBANDS_LENGTH, length=BBANDS_LENGTH, stat="mean"
+)
+declare("bb_std", ["close"], Rolling, length=BBANDS_LENGTH, stat="std", ddof=0)
+bands = ["bb_middle", "bb_std"]
+declare("bb_upper", bands, formula(_bb_upper), BBANDS_LENGTH)
+declare("bb_lower", bands, formula(_bb_lower), BBANDS_LENGTH)
+bands = ["bb_upper", "bb_lower"]
+declare("bb_width", bands + ["bb_middle"], formula(_bb_width), BBANDS_LENGTH)
+declare("bb_percent", ["close"] + bands, formula(_bb_percent), BBANDS_LENGTH)
+
+# RSI 14
+declare("change", ["close", "prev_close"], formula(np.subtract))
+declare("rsi_gain", ["change"], formula(_gain))
+declare("rsi_loss", ["change"], formula(_loss))
+declare("rsi_gain_avg", ["rsi_gain"], Rma, length=14)
+declare("rsi_loss_avg", ["rsi_loss"], Rma, length=14)
+declare("rsi", ["rsi_gain_avg", "rsi_loss_avg"], formula(_rsi))
+
+
+def resolve(names, registry=REGISTRY):
+    """The indicators needed for ``names``, dependencies first"""
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in INPUT_COLUMNS or name in order:
+            return
+        if name not in registry:
+            raise KeyError(f"Unknown indicator {name!r}")
+        if name in visiting:
+            raise ValueError(f"Indicator {name!r} depends on itself")
+        visiting.add(name)
+        for dependency in registry[name].inputs:
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def _mask(values, offset, first_row):
+    """``values`` starting at ``first_row``, empty before row ``offset``"""
+    if first_row >= offset:
+        return values
+    values = values.copy()
+    values[: offset - first_row] = np.nan
+    return values
+
+
+def compute(df, names, cache=None, registry=REGISTRY):
+    """Compute ``names`` over the whole ``INPUT_COLUMNS`` series of ``df``.
+
+    ``cache`` is a dict of the series computed so far on the same data,
+    and is updated in place: the indicators and intermediates found in it
+    are not computed again.
+
+    Returns:
+        DataFrame of the ``names`` columns
+    """
+    cache = {} if cache is None else cache
+    for column in INPUT_COLUMNS:
+        if column not in cache and column in df:
+            cache[column] = df[column].to_numpy(np.float64)
+    for name in resolve(names, registry):
+        if name not in cache:
+            indicator = registry[name]
+            cache[name] = indicator.node().update(*(cache[i] for i in indicator.inputs))
+    return pd.DataFrame(
+        {
+            name: _mask(cache[name], getattr(registry.get(name), "offset", 0), 0)
+            for name in names
+        },
+        index=df.index,
+    )
+
+
+class IndicatorPipeline:
+    """Indicators of data that arrives in chunks, e.g. appended raw rows.
+
+    ``update(df)`` takes the next rows and returns them with the ``names``
+    columns; ``get_state``/``set_state`` (JSON compatible) let a later run
+    continue where this one stopped.
+    """
+
+    def __init__(self, names=INDICATOR_COLUMNS, registry=REGISTRY):
+        self.names = list(names)
+        self.registry = registry
+        self.order = resolve(self.names, registry)
+        self.nodes = {name: registry[name].node() for name in self.order}
+        self.rows = 0
+
+    def get_state(self):
+        return {
+            "rows": self.rows,
+            "nodes": {name: node.get_state() for name, node in self.nodes.items()},
+        }
+
+    def set_state(self, state):
+        self.rows = state["rows"]
+        for name, node in self.nodes.items():
+            node.set_state(state["nodes"][name])
+
+    def update(self, df):
+        df = df[INPUT_COLUMNS].reset_index(drop=True)
+        values = {column: df[column].to_numpy(np.float64) for column in INPUT_COLUMNS}
+        for name in self.order:
+            inputs = (values[i] for i in self.registry[name].inputs)
+            values[name] = self.nodes[name].update(*inputs)
+        out = pd.DataFrame(
+            {
+                name: _mask(values[name], self.registry[name].offset, self.rows)
+                for name in self.names
+            },
+            index=df.index,
+        )
+        self.rows += len(df)
+        return pd.concat([df, out], axis=1)
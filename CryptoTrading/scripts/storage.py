@@ -0,0 +1,219 @@
+"""Columnar storage of market data as memory-mapped NumPy files.
+
+A dataset, e.g. ``data/columns/BTCUSDT_1h``, is a directory with one
+``<column>.npy`` file per column and a ``manifest.json`` describing it
+(symbol, timeframe, row count, last timestamp and column dtypes). Loading
+maps only the requested columns, so reading a dataset costs next to
+nothing compared to parsing its CSV.
+
+    python scripts/storage.py data/raw data/columns/raw [--dtype float32]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = "manifest.json"
+
+# Open time of each bar in the raw files, in milliseconds
+TIMESTAMP_COLUMN = "timestamp_open"
+
+
+def dataset_name(symbol, timeframe):
+    return f"{symbol}_{timeframe}"
+
+
+def _column_file(path, column):
+    return os.path.join(path, f"{column}.npy")
+
+
+def _save(file, values):
+    # Write then rename, so that a reader never maps a partial file
+    tmp = f"{file}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp, file)
+
+
+def _append(file, values, rows):
+    """Write ``values`` after the first ``rows`` of the 1-D array of ``file``.
+
+    The rows are written in place, then the header's shape is patched:
+    np.save pads the header so the shape can grow without moving the data.
+    Rows past ``rows``, left by an interrupted append, are overwritten.
+
+    Returns:
+        False, writing nothing, if the new header does not fit
+    """
+    with open(file, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        prefix = f.tell()
+        if version == (1, 0):
+            _, _, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            _, _, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+        header = repr(
+            {
+                "descr": np.lib.format.dtype_to_descr(dtype),
+                "fortran_order": False,
+                "shape": (rows + len(values),),
+            }
+        )
+        # The header length field stays as is, 2 or 4 bytes
+        width = 2 if version == (1, 0) else 4
+        if len(header) + 1 > offset - prefix - width:
+            return False
+        f.seek(offset + rows * dtype.itemsize)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        f.truncate()
+        f.flush()
+        f.seek(prefix + width)
+        f.write(header.ljust(offset - prefix - width - 1).encode("latin1") + b"\n")
+    return True
+
+
+def _cast(df, dtype):
+    """Float columns as ``dtype``, a dtype or a {column: dtype} dict"""
+    columns = {}
+    for column, values in df.items():
+        values = values.to_numpy()
+        if isinstance(dtype, dict):
+            if column in dtype:
+                values = values.astype(dtype[column])
+        elif values.dtype.kind == "f":
+            values = values.astype(dtype)
+        columns[column] = values
+    return columns
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+
+def _write_manifest(path, symbol, timeframe, columns):
+    rows = len(next(iter(columns.values()))) if columns else 0
+    last_timestamp = None
+    if rows and TIMESTAMP_COLUMN in columns:
+        last = int(columns[TIMESTAMP_COLUMN][-1])
+        last_timestamp = pd.Timestamp(last, unit="ms").isoformat()
+    manifest = {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "rows": rows,
+        "last_timestamp": last_timestamp,
+        "columns": {column: values.dtype.str for column, values in columns.items()},
+    }
+    tmp = os.path.join(path, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+    return manifest
+
+
+def write_columns(df, root, symbol, timeframe, dtype=np.float64):
+    """Store ``df`` as the ``symbol``/``timeframe`` dataset under ``root``.
+
+    Args:
+        dtype: dtype of the float columns, e.g. np.float32 to halve the
+            size, or a {column: dtype} dict
+
+    Returns:
+        The dataset's manifest
+    """
+    path = os.path.join(root, dataset_name(symbol, timeframe))
+    os.makedirs(path, exist_ok=True)
+    columns = _cast(df, dtype)
+    for column, values in columns.items():
+        _save(_column_file(path, column), values)
+    return _write_manifest(path, symbol, timeframe, columns)
+
+
+def append_columns(df, root, symbol, timeframe):
+    """Append rows to a stored dataset, in its existing dtypes.
+
+    Each column file grows in place, so an append costs the new rows only.
+    The manifest is written last and its row count is authoritative: an
+    interrupted append leaves rows past it, which readers ignore and the
+    next append overwrites.
+
+    Returns:
+        The dataset's manifest
+    """
+    path = os.path.join(root, dataset_name(symbol, timeframe))
+    manifest = read_manifest(path)
+    if set(df.columns) != set(manifest["columns"]):
+        raise ValueError(
+            f"Columns {sorted(df.columns)} do not match the stored "
+            f"{sorted(manifest['columns'])}"
+        )
+    rows = manifest["rows"]
+    for column, dtype in manifest["columns"].items():
+        file = _column_file(path, column)
+        values = df[column].to_numpy().astype(dtype)
+        if not _append(file, values, rows):
+            stored = np.load(file, mmap_mode="r")[:rows]
+            _save(file, np.concatenate((stored, values)))
+    columns = load_arrays(root, symbol, timeframe, rows=rows + len(df))
+    return _write_manifest(path, symbol, timeframe, columns)
+
+
+def load_arrays(root, symbol, timeframe, columns=None, rows=None):
+    """Memory-mapped, read-only arrays of ``columns`` (default: all), of the
+    manifest's number of rows unless ``rows`` is given"""
+    path = os.path.join(root, dataset_name(symbol, timeframe))
+    manifest = read_manifest(path)
+    stored = manifest["columns"]
+    columns = list(stored) if columns is None else list(columns)
+    missing = [column for column in columns if column not in stored]
+    if missing:
+        raise KeyError(f"{dataset_name(symbol, timeframe)} has no columns {missing}")
+    rows = manifest["rows"] if rows is None else rows
+    return {
+        column: np.load(_column_file(path, column), mmap_mode="r")[:rows]
+        for column in columns
+    }
+
+
+def load_frame(root, symbol, timeframe, columns=None):
+    """DataFrame of ``columns`` (default: all) of a stored dataset"""
+    return pd.DataFrame(load_arrays(root, symbol, timeframe, columns))
+
+
+def has_dataset(root, symbol, timeframe):
+    return os.path.exists(os.path.join(root, dataset_name(symbol, timeframe), MANIFEST))
+
+
+def list_datasets(root):
+    """DataFrame of the manifests of every dataset under ``root``"""
+    manifests = []
+    if os.path.isdir(root):
+        for name in sorted(os.listdir(root)):
+            if os.path.exists(os.path.join(root, name, MANIFEST)):
+                manifests.append(read_manifest(os.path.join(root, name)))
+    return pd.DataFrame(
+        manifests, columns=["symbol", "timeframe", "rows", "last_timestamp", "columns"]
+    )
+
+
+def convert_csv_dir(input_dir, root, dtype=np.float64):
+    """Store every ``<symbol>_<timeframe>.csv`` of ``input_dir`` under ``root``"""
+    for file in sorted(os.listdir(input_dir)):
+        if file.endswith(".csv"):
+            symbol, timeframe = file[: -len(".csv")].rsplit("_", 1)
+            df = pd.read_csv(os.path.join(input_dir, file))
+            manifest = write_columns(df, root, symbol, timeframe, dtype)
+            print(f"Stored {file}: {manifest['rows']} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert CSV files to column files")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--dtype", default="float64", choices=["float32", "float64"])
+    args = parser.parse_args()
+    convert_csv_dir(args.input_dir, args.output_dir, np.dtype(args.dtype))
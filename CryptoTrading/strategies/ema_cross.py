@@ -0,0 +1,28 @@
+import numpy as np
+
+
+class EmaCrossStrategy:
+    """Fully invested while the short EMA is above the long EMA, else flat.
+
+    Implements both ``signals`` and ``on_tick``, which give the same fills.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.fast = config.get("fast", "ema_short")
+        self.slow = config.get("slow", "ema_long")
+        self.columns = [self.fast, self.slow]
+
+    def signals(self, data):
+        fast = data[self.fast].to_numpy(np.float64)
+        slow = data[self.slow].to_numpy(np.float64)
+        targets = np.where(fast > slow, 1.0, 0.0)
+        targets[np.isnan(fast) | np.isnan(slow)] = np.nan
+        return targets
+
+    def on_tick(self, market_snapshot):
+        fast = market_snapshot[self.fast]
+        slow = market_snapshot[self.slow]
+        if np.isnan(fast) or np.isnan(slow):
+            return {}
+        return {"position": 1.0 if fast > slow else 0.0}
@@ -1,7 +1,17 @@
 class TemplateStrategy:
+    """Starting point for a strategy, see ``backtest.engine.run_backtest``.
+
+    ``on_tick`` receives the row of the current bar (OHLCV and indicators)
+    with the account's ``cash`` and ``units``, and returns the target
+    position, the fraction of equity to hold in the asset, filled at the
+    next bar's open. Define ``signals(data)`` instead to return the targets
+    of every bar at once and run on the vectorized path.
+    """
+
     def __init__(self, config=None):
         pass
 
     def on_tick(self, market_snapshot):
-        # TODO: Make a decision: buy/sell/hold
+        # TODO: Make a decision: {"position": 1.0} to buy, {"position": 0.0}
+        # to sell, {} to hold
         return {}
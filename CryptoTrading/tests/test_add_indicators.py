@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+import pytest
+
+from backtest.engine import DATA_DIR
+from scripts import storage
+
+
+@pytest.fixture
+def process_file(monkeypatch):
+    # add_indicators.py runs as a script, with the scripts directory on its path
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(DATA_DIR), "scripts"))
+    from add_indicators import process_file
+
+    return process_file
+
+
+@pytest.mark.parametrize(
+    "first, second", [(("csv",), ("csv", "npy")), (("npy",), ("csv",))]
+)
+def test_changing_formats_rebuilds(tmp_path, process_file, first, second):
+    raw = pd.read_csv(f"{DATA_DIR}/raw/BTCUSDT_4h.csv")
+    input_dir, output_dir, store_dir = (tmp_path / d for d in ("raw", "out", "store"))
+    input_dir.mkdir()
+    output_dir.mkdir()
+
+    def run(formats):
+        return process_file(
+            "BTCUSDT_4h.csv", input_dir, output_dir, formats=formats, store_dir=store_dir
+        )
+
+    raw.iloc[:200].to_csv(input_dir / "BTCUSDT_4h.csv", index=False)
+    assert run(first) == (200, True)
+    raw.to_csv(input_dir / "BTCUSDT_4h.csv", index=False)
+    # A format the last run did not write is rebuilt, not appended to
+    assert run(second) == (len(raw), True)
+    assert run(second) == (0, False)
+
+    expected = pd.read_csv(f"{DATA_DIR}/processed/BTCUSDT_4h.csv")
+    if "csv" in second:
+        processed = pd.read_csv(output_dir / "BTCUSDT_4h.csv")
+        pd.testing.assert_frame_equal(processed, expected, rtol=1e-6)
+    if "npy" in second:
+        stored = storage.load_frame(store_dir, "BTCUSDT", "4h", list(expected.columns))
+        pd.testing.assert_frame_equal(stored, expected, rtol=1e-6)
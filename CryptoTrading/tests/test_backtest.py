@@ -1 +1,76 @@
-# Placeholder for backtest unit tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.engine import FEE, SLIPPAGE, Portfolio, load_data, run_backtest
+from strategies.ema_cross import EmaCrossStrategy
+from strategies.template_strategy import TemplateStrategy
+
+
+class ScriptedStrategy:
+    """Replays fixed targets on both paths, NaN meaning hold"""
+
+    def __init__(self, targets):
+        self.targets = np.asarray(targets, dtype=np.float64)
+
+    def signals(self, data):
+        return self.targets
+
+    def on_tick(self, market_snapshot):
+        target = self.targets[market_snapshot["bar"]]
+        return {} if np.isnan(target) else {"position": target}
+
+
+def bars(opens, closes=None):
+    opens = np.asarray(opens, dtype=np.float64)
+    return pd.DataFrame({"open": opens, "close": opens if closes is None else closes})
+
+
+@pytest.mark.parametrize("mode", ["vectorized", "event"])
+def test_fills_at_next_open_with_fee_and_slippage(mode):
+    data = bars([100.0, 110.0, 120.0, 130.0])
+    result = run_backtest(ScriptedStrategy([1.0, np.nan, 0.0, np.nan]), data, mode=mode)
+
+    buy, sell = result.fills.to_dict("records")
+    assert (buy["bar"], buy["side"]) == (1, "buy")
+    assert buy["price"] == pytest.approx(110.0 * (1 + SLIPPAGE))
+    assert buy["qty"] * buy["price"] * (1 + FEE) == pytest.approx(10_000.0)
+    assert (sell["bar"], sell["side"]) == (3, "sell")
+    assert sell["qty"] == pytest.approx(buy["qty"])
+    assert sell["price"] == pytest.approx(130.0 * (1 - SLIPPAGE))
+    assert result.equity.iloc[-1] == pytest.approx(sell["cash"])
+
+
+def test_paths_produce_identical_fills():
+    data = load_data("BTCUSDT", "1h")
+    vectorized = run_backtest(EmaCrossStrategy(), data, mode="vectorized")
+    event = run_backtest(EmaCrossStrategy(), data, mode="event")
+
+    assert len(vectorized.fills) > 0
+    pd.testing.assert_frame_equal(vectorized.fills, event.fills)
+    pd.testing.assert_series_equal(vectorized.equity, event.equity)
+
+
+def test_partial_rebalance_keeps_paths_in_step():
+    data = bars([100.0, 90.0, 95.0, 105.0, 80.0, 85.0])
+    strategy = ScriptedStrategy([0.5, 0.5, 1.0, 0.25, np.nan, 0.0])
+    vectorized = run_backtest(strategy, data, mode="vectorized")
+    event = run_backtest(strategy, data, mode="event")
+
+    # The repeated 0.5 target does not trade, and the last bar's is never filled
+    assert vectorized.fills["bar"].tolist() == [1, 3, 4]
+    pd.testing.assert_frame_equal(vectorized.fills, event.fills)
+
+
+def test_template_strategy_holds():
+    result = run_backtest(TemplateStrategy(), bars([100.0, 101.0, 102.0]))
+    assert result.fills.empty
+    assert result.stats["final_equity"] == 10_000.0
+
+
+def test_rebalance_is_capped_by_holdings():
+    portfolio = Portfolio(cash=1_000.0, fee=0.0, slippage=0.0)
+    assert portfolio.rebalance(0, 100.0, 2.0)["qty"] == pytest.approx(10.0)
+    assert portfolio.rebalance(1, 100.0, 1.0) is None
+    assert portfolio.rebalance(2, 50.0, -1.0)["qty"] == pytest.approx(10.0)
+    assert portfolio.units == 0.0
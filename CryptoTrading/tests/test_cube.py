@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from backtest.cube import MultiTimeframeCube, build_cube
+
+
+def write_raw(data_dir, symbol, timeframe, start, minutes, closes):
+    closes = np.asarray(closes, dtype=np.float64)
+    start = pd.Timestamp(start).value // 1_000_000
+    pd.DataFrame(
+        {
+            "timestamp_open": start + np.arange(len(closes)) * minutes * 60_000,
+            "open": closes,
+            "high": closes,
+            "low": closes,
+            "close": closes,
+            "volume": np.ones(len(closes)),
+        }
+    ).to_csv(data_dir / "raw" / f"{symbol}_{timeframe}.csv", index=False)
+
+
+def test_higher_timeframes_are_seen_once_closed(tmp_path):
+    (tmp_path / "raw").mkdir()
+    write_raw(tmp_path, "BTCUSDT", "15m", "2024-01-01", 15, np.arange(8.0))
+    write_raw(tmp_path, "BTCUSDT", "1h", "2024-01-01", 60, [10.0, 20.0])
+    # Listed half an hour later
+    write_raw(tmp_path, "ETHUSDT", "15m", "2024-01-01 00:30", 15, np.arange(6.0))
+    write_raw(tmp_path, "ETHUSDT", "1h", "2024-01-01 01:00", 60, [30.0])
+
+    build_cube(tmp_path / "cube", fields=["close", "change"], data_dir=tmp_path)
+    cube = MultiTimeframeCube(tmp_path / "cube")
+
+    assert cube.symbols == ["BTCUSDT", "ETHUSDT"]
+    assert cube.timeframes == ["15m", "1h"]
+    assert isinstance(cube.values, np.memmap)
+    assert cube.values.shape == (8, 2, 2, 2)
+    assert cube.timestamps[0] == pd.Timestamp("2024-01-01")
+
+    # The first hour closes with the fourth 15m bar, the second with the last
+    hourly = [cube.get(bar, "BTCUSDT", "1h", "close") for bar in range(8)]
+    np.testing.assert_array_equal(hourly, [np.nan] * 3 + [10.0] * 4 + [20.0])
+    np.testing.assert_array_equal(
+        cube.values[:, 1, 0, 0], [np.nan, np.nan, 0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    )
+    np.testing.assert_array_equal(cube.values[:, 1, 1, 0], [np.nan] * 7 + [30.0])
+    assert cube.get(3, "BTCUSDT", "15m", "change") == 1.0
+
+    frame = cube.frame("BTCUSDT", fields=["close"])
+    assert list(frame.columns) == ["timestamp", "close", "close_1h"]
+    np.testing.assert_array_equal(frame["close_1h"], hourly)
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.engine import DATA_DIR
+from scripts.indicators import (
+    INPUT_COLUMNS,
+    MACD_LENGTH,
+    IndicatorPipeline,
+    Lag,
+    Rolling,
+    compute,
+    declare,
+    formula,
+    resolve,
+)
+
+
+def test_chunked_updates_match_a_single_pass():
+    raw = pd.read_csv(f"{DATA_DIR}/raw/BTCUSDT_4h.csv", usecols=INPUT_COLUMNS)
+    full = IndicatorPipeline().update(raw)
+
+    parts, state = [], None
+    for rows in np.array_split(np.arange(len(raw)), [1, 5, 30, 200, 200]):
+        indicators = IndicatorPipeline()
+        if state is not None:
+            # Round trip through JSON, as add_indicators.py saves it
+            indicators.set_state(json.loads(state))
+        parts.append(indicators.update(raw.iloc[rows]))
+        state = json.dumps(indicators.get_state())
+
+    chunked = pd.concat(parts, ignore_index=True)
+    pd.testing.assert_frame_equal(chunked, full, rtol=1e-10)
+
+
+def test_matches_the_processed_data():
+    raw = pd.read_csv(f"{DATA_DIR}/raw/ETHUSDT_1h.csv", usecols=INPUT_COLUMNS)
+    processed = pd.read_csv(f"{DATA_DIR}/processed/ETHUSDT_1h.csv")
+    pd.testing.assert_frame_equal(IndicatorPipeline().update(raw), processed, rtol=1e-6)
+
+
+def test_compute_shares_intermediates():
+    raw = pd.read_csv(f"{DATA_DIR}/raw/BTCUSDT_4h.csv", usecols=INPUT_COLUMNS)
+    cache = {}
+    compute(raw, ["ema_long"], cache)
+    ema_long = cache["ema_long"]
+
+    macd = compute(raw, ["macd"], cache)["macd"]
+    # The slow EMA of MACD is the cached ema_long, not a second copy
+    assert cache["ema_long"] is ema_long
+    assert "rsi" not in cache
+    assert macd.iloc[: MACD_LENGTH].isna().all()
+    np.testing.assert_array_equal(
+        macd.iloc[MACD_LENGTH:], (cache["ema_fast"] - ema_long)[MACD_LENGTH:]
+    )
+
+
+def test_custom_registry():
+    registry = {}
+    declare("sma_3", ["close"], Rolling, registry=registry, length=3, stat="mean")
+    declare("gap", ["close", "sma_3"], formula(np.subtract), 3, registry=registry)
+    assert resolve(["gap"], registry) == ["sma_3", "gap"]
+
+    df = pd.DataFrame({"close": [1.0, 2.0, 3.0, 5.0]})
+    out = compute(df, ["gap"], registry=registry)
+    np.testing.assert_array_equal(out["gap"], [np.nan, np.nan, np.nan, 5.0 - 10 / 3])
+
+    declare("loop", ["loop"], Lag, registry=registry)
+    with pytest.raises(ValueError):
+        resolve(["loop"], registry)
+    with pytest.raises(KeyError):
+        resolve(["missing"], registry)
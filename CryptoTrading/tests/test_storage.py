@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from scripts import storage
+
+
+def test_write_append_and_project(tmp_path):
+    df = pd.DataFrame(
+        {
+            "timestamp_open": np.arange(5, dtype=np.int64) * 3_600_000,
+            "close": np.linspace(1.0, 2.0, 5),
+            "rsi": np.linspace(30.0, 70.0, 5),
+        }
+    )
+    storage.write_columns(df.iloc[:3], tmp_path, "BTCUSDT", "1h", dtype=np.float32)
+    manifest = storage.append_columns(df.iloc[3:], tmp_path, "BTCUSDT", "1h")
+
+    assert manifest["rows"] == 5
+    assert manifest["last_timestamp"] == "1970-01-01T04:00:00"
+    assert manifest["columns"] == {
+        "timestamp_open": "<i8",
+        "close": "<f4",
+        "rsi": "<f4",
+    }
+
+    arrays = storage.load_arrays(tmp_path, "BTCUSDT", "1h", ["rsi"])
+    assert list(arrays) == ["rsi"]
+    assert isinstance(arrays["rsi"], np.memmap)
+    np.testing.assert_array_equal(arrays["rsi"], df["rsi"].astype(np.float32))
+
+    listed = storage.list_datasets(tmp_path)[["symbol", "timeframe", "rows"]]
+    assert listed.values.tolist() == [["BTCUSDT", "1h", 5]]
+
+
+def test_append_grows_files_in_place(tmp_path):
+    df = pd.DataFrame({"close": np.arange(6.0)})
+    storage.write_columns(df.iloc[:2], tmp_path, "BTCUSDT", "1h")
+    file = tmp_path / "BTCUSDT_1h" / "close.npy"
+    inode = file.stat().st_ino
+
+    # An append interrupted before its manifest: the rows are ignored
+    storage._append(file, np.array([-1.0, -1.0, -1.0]), 2)
+    assert storage.read_manifest(file.parent)["rows"] == 2
+    assert len(storage.load_arrays(tmp_path, "BTCUSDT", "1h")["close"]) == 2
+
+    storage.append_columns(df.iloc[2:4], tmp_path, "BTCUSDT", "1h")
+    storage.append_columns(df.iloc[4:], tmp_path, "BTCUSDT", "1h")
+    assert file.stat().st_ino == inode
+    np.testing.assert_array_equal(np.load(file), df["close"])
+    np.testing.assert_array_equal(storage.load_frame(tmp_path, "BTCUSDT", "1h"), df)
@@ -1,76 +1,312 @@
 import pandas as pd
 import numpy as np
-import uuid
 import json
+from contextlib import nullcontext
 from pathlib import Path
-from trader import Trader
+from trader import CompactTrader, EquityCurve, Trader, initial_portfolio_value
+from journal import OrderJournal, random_ids
+from data_cache import NUMERIC_COLUMNS, load_market_data
+from instrumentation import BacktestProfiler
+from vectorized import run_vectorized
 
-# from strategy import strategyßß
-# from strategy2 import strategy
-# from strategy3 import strategy
-# from strategy4 import strategy
+# Strategy used when run_backtest is not given one, see registry.py to pick others
+from strategy9 import strategy as default_strategy
 
-from strategy9 import strategy
+
+def load_hyperparameters(path) -> tuple[float, dict[str, float]]:
+    """Read a hyperparameters.json file into ``(fee, balances)``"""
+    hyperparameters = json.loads(Path(path).read_text())
+    fee = hyperparameters.get("fee", 3.0) / 10000
+    balances = {
+        "fiat": hyperparameters.get("fiat_balance", 10000.0),
+        "token_1": hyperparameters.get("token1_balance", 0.0),
+        "token_2": hyperparameters.get("token2_balance", 0.0),
+    }
+    return fee, balances
+
+
+def iter_ticks_pandas(combined_data: pd.DataFrame):
+    """Yield ``(timestamp, [(pair, data_dict), ...])`` using pandas groupby.
+
+    Reference implementation: every row goes through ``iterrows`` and
+    ``to_dict``, which dominates the runtime on long datasets.
+    """
+    for timestamp, group in combined_data.groupby("timestamp"):
+        yield timestamp, [(row["symbol"], row.to_dict()) for _, row in group.iterrows()]
+
+
+def iter_ticks_numpy(combined_data: pd.DataFrame):
+    """Yield ``(timestamp, [(pair, data_dict), ...])`` from pre-pivoted arrays.
+
+    ``combined_data`` is pivoted once into one ``(timestamp, pair)`` grid per
+    column (open/high/low/close/volume, ...), so each tick is replayed with
+    plain array indexing instead of a groupby + iterrows pass. The data
+    dicts carry the same keys and native Python values as ``row.to_dict()``.
+    """
+    timestamps, ts_index = np.unique(
+        combined_data["timestamp"].to_numpy(), return_inverse=True
+    )
+    pairs, pair_index = np.unique(
+        combined_data["symbol"].to_numpy(), return_inverse=True
+    )
+    shape = (len(timestamps), len(pairs))
+
+    present = np.zeros(shape, dtype=bool)
+    present[ts_index, pair_index] = True
+
+    columns = list(combined_data.columns)
+    grids = []
+    for column in columns:
+        values = combined_data[column]
+        if values.dtype.kind == "M":
+            # Keep pd.Timestamp values, as row.to_dict() does
+            values = values.astype(object)
+        values = values.to_numpy()
+        grid = np.empty(shape, dtype=values.dtype)
+        grid[ts_index, pair_index] = values
+        grids.append(grid)
+
+    pairs = pairs.tolist()
+    for t, timestamp in enumerate(pd.Index(timestamps)):
+        rows = [grid[t].tolist() for grid in grids]
+        yield timestamp, [
+            (pairs[p], dict(zip(columns, [values[p] for values in rows])))
+            for p in np.flatnonzero(present[t])
+        ]
+
+
+ENGINES = {
+    "pandas": iter_ticks_pandas,
+    "numpy": iter_ticks_numpy,
+}
+
+TRADERS = {
+    "dict": Trader,
+    "compact": CompactTrader,
+}
+
+
+def iter_ticks_chunked(chunks, engine: str = "numpy"):
+    """Yield ``(timestamp, [(pair, data_dict), ...])`` from DataFrame chunks.
+
+    ``chunks`` must be in timestamp order. The rows of the last timestamp of
+    each chunk are held back and prepended to the next one, since that
+    timestamp may continue there, so every tick is complete and only one
+    chunk (plus that boundary group) is in memory at a time.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+        timestamps = chunk["timestamp"]
+        if not timestamps.is_monotonic_increasing:
+            raise ValueError("Streamed market data must be sorted by timestamp")
+        boundary = timestamps.searchsorted(timestamps.iloc[-1], side="left")
+        carry = chunk.iloc[boundary:]
+        yield from ENGINES[engine](chunk.iloc[:boundary])
+    if carry is not None:
+        yield from ENGINES[engine](carry)
+
+
+def read_csv_chunks(path, chunksize: int = 100_000):
+    """Read a timestamp-sorted market data CSV ``chunksize`` rows at a time"""
+    # Fixed dtypes, so that every chunk parses the prices the same way
+    dtype = {column: "float64" for column in NUMERIC_COLUMNS}
+    with pd.read_csv(path, chunksize=chunksize, dtype=dtype) as reader:
+        yield from reader
+
+
+def read_cache_chunks(path, chunksize: int = 100_000):
+    """Slice the memory-mapped columnar cache of ``path`` into chunks.
+
+    The slices are views on the mapped columns, so only the pages of the
+    chunk being replayed have to be resident.
+    """
+    combined_data = load_market_data(path)
+    for start in range(0, len(combined_data), chunksize):
+        yield combined_data.iloc[start : start + chunksize]
+
+
+CHUNK_SOURCES = {
+    "csv": read_csv_chunks,
+    "cache": read_cache_chunks,
+}
 
 
 def run_backtest(
-    combined_data: pd.DataFrame, fee: float, balances: dict[str, float]
+    combined_data: pd.DataFrame,
+    fee: float,
+    balances: dict[str, float],
+    strategy=None,
+    engine: str = "pandas",
+    **options,
 ) -> pd.DataFrame:
     """Run a backtest with multiple trading pairs.
 
     Args:
-        submission_dir: Path to the strategy directory
         combined_data: DataFrame containing market data for multiple pairs
         fee: Trading fee (in basis points, e.g., 2 = 0.02%)
         balances: Dictionary of {pair: amount} containing initial balances
+        strategy: Strategy instance exposing ``on_data``, defaults to strategy9
+        engine: Tick replay engine, one of ``ENGINES`` ("pandas" or "numpy").
+            Both feed the strategy the same ``market_data`` and produce the
+            same order log; "numpy" is much faster on long datasets.
+            "vectorized" runs strategies exposing ``signals`` through
+            ``vectorized.run_vectorized`` instead of tick by tick.
+        **options: journal, equity_curve, trader_type, profiler and
+            id_generator, see ``replay_ticks``
     """
-    # Record initial balances for display
-    trader = Trader(balances, fee)
+    if strategy is None:
+        strategy = default_strategy
+    if engine == "vectorized":
+        if not hasattr(strategy, "signals"):
+            raise ValueError("The vectorized engine needs a strategy with signals")
+        options.pop("trader_type", None)
+        options.pop("profiler", None)
+        return run_vectorized(combined_data, fee, balances, strategy, **options)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {list(ENGINES)}")
 
-    initial_balances = balances.copy()
+    if not combined_data["timestamp"].is_monotonic_increasing:
+        combined_data.sort_values("timestamp", inplace=True)
 
-    # Initialize prices with first data point for each pair
-    combined_data.sort_values("timestamp", inplace=True)
-    first_prices = {k: df.iloc[0]["close"] for k, df in combined_data.groupby("symbol")}
+    return replay_ticks(
+        ENGINES[engine](combined_data), fee, balances, strategy, **options
+    )
 
-    # Calculate true initial portfolio value including all assets
-    initial_portfolio_value = initial_balances["fiat"]
-    if "token_1/fiat" in first_prices and initial_balances["token_1"] > 0:
-        initial_portfolio_value += (
-            initial_balances["token_1"] * first_prices["token_1/fiat"]
-        )
-    if "token_2/fiat" in first_prices and initial_balances["token_2"] > 0:
-        initial_portfolio_value += (
-            initial_balances["token_2"] * first_prices["token_2/fiat"]
+
+def run_backtest_streaming(
+    path,
+    fee: float,
+    balances: dict[str, float],
+    strategy=None,
+    source: str = "csv",
+    chunksize: int = 100_000,
+    engine: str = "numpy",
+    **options,
+) -> pd.DataFrame:
+    """Run a backtest over a market data file without loading it whole.
+
+    The file is replayed ``chunksize`` rows at a time, so memory stays flat
+    as the dataset grows (apart from the orders and the equity curve, one
+    float per timestamp). The order log matches ``run_backtest`` with the
+    same ``engine``.
+
+    Args:
+        path: Market data CSV, which must be sorted by timestamp
+        source: One of ``CHUNK_SOURCES``: "csv" parses the CSV in chunks,
+            "cache" slices its memory-mapped columnar cache (built on first
+            use, see data_cache.py)
+        chunksize: Rows per chunk
+        engine: Engine used to replay each chunk, one of ``ENGINES``
+        **options: journal, equity_curve, trader_type, profiler and
+            id_generator, see ``replay_ticks``
+    """
+    if source not in CHUNK_SOURCES:
+        raise ValueError(
+            f"Unknown source {source!r}, expected one of {list(CHUNK_SOURCES)}"
         )
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {list(ENGINES)}")
 
-    trader.equity_history = [initial_portfolio_value]
-    # Combine all dataframes and sort by timestamp
-    result = pd.DataFrame(
-        columns=["id", "timestamp", "pair", "side", "qty"],
-    )
+    ticks = iter_ticks_chunked(CHUNK_SOURCES[source](path, chunksize), engine)
+    return replay_ticks(ticks, fee, balances, strategy, **options)
+
+
+def replay_ticks(
+    ticks,
+    fee: float,
+    balances: dict[str, float],
+    strategy=None,
+    journal: OrderJournal | None = None,
+    equity_curve: EquityCurve | None = None,
+    trader_type: str = "dict",
+    profiler: BacktestProfiler | None = None,
+    id_generator=random_ids,
+    atomic_orders: bool = False,
+) -> pd.DataFrame:
+    """Feed ``(timestamp, [(pair, data_dict), ...])`` ticks to a strategy.
+
+    Args:
+        ticks: Iterable of ticks in timestamp order, e.g. from ``ENGINES``
+        fee: Trading fee as a fraction
+        balances: Dictionary of {currency: amount} containing initial balances
+        strategy: Strategy instance exposing ``on_data``, defaults to strategy9
+        journal: Optional OrderJournal to record the orders into, so the
+            caller can hand it to ``calculate_metrics`` without a copy.
+        equity_curve: Optional EquityCurve that receives the initial
+            portfolio value and then one mark-to-market sample per timestamp.
+        trader_type: Trader implementation, one of ``TRADERS``. "compact" keeps
+            prices and balances in integer-indexed lists and is cheaper per
+            tick; ``balances`` is updated with its final balances at the end.
+        profiler: Optional BacktestProfiler recording the wall time and call
+            count of every stage of the tick loop and the ``on_data``
+            latencies, and running the loop under cProfile if it was given
+            a ``stats_path``. See ``BacktestProfiler.report``.
+        id_generator: Order id generator passed to ``OrderJournal.to_frame``,
+            e.g. ``journal.seeded_ids(seed)`` for reproducible output
+        atomic_orders: Execute the orders of each tick all-or-nothing, see
+            ``Trader.execute_batch``
+
+    Returns:
+        The ``id,timestamp,pair,side,qty`` order log
+    """
+    if trader_type not in TRADERS:
+        raise ValueError(f"Unknown trader {trader_type!r}, expected one of {list(TRADERS)}")
+    if strategy is None:
+        strategy = default_strategy
+
+    # Record initial balances for display
+    if journal is None:
+        journal = OrderJournal()
+    trader = TRADERS[trader_type](balances, fee, equity_curve, journal)
+
+    initial_balances = balances.copy()
+
+    # The initial portfolio value needs the first price of each pair, it is
+    # filled in once the ticks have been replayed
+    initial_sample = len(trader.equity_curve)
+    trader.equity_curve.append(np.nan)
+
+    update_market = trader.update_market
+    on_data = strategy.on_data
+    execute_batch = trader.execute_batch
+    mark_to_market = trader.mark_to_market
+    to_frame = journal.to_frame
+    if profiler is not None:
+        ticks = profiler.timed_iter("ticks", ticks)
+        update_market = profiler.timed("update_market", update_market)
+        on_data = profiler.timed("on_data", on_data)
+        execute_batch = profiler.timed("execute_batch", execute_batch)
+        mark_to_market = profiler.timed("mark_to_market", mark_to_market)
+        to_frame = profiler.timed("to_frame", to_frame)
+    profiling = profiler.profiling() if profiler is not None else nullcontext()
 
     # Process data timestamp by timestamp
-    for timestamp, group in combined_data.groupby("timestamp"):
-        # Update prices for each pair in this timestamp
-        market_data = {
-            "fee": fee,
-        }
-        for _, row in group.iterrows():
-            pair = row["symbol"]
-            data_dict = row.to_dict()
-            # Add fee information to market data so strategies can access it
-            market_data[pair] = data_dict
-            trader.update_market(pair, data_dict)
-
-        # Get strategy decision based on all available market data and current balances
-        orders = strategy.on_data(market_data, balances)
-
-        # Handle list of orders
-        for order in orders:
-            trader.execute(order)
-            order["timestamp"] = timestamp
-            order["id"] = str(uuid.uuid4())
-            result = pd.concat([result, pd.DataFrame([order])], ignore_index=True)
-
-    return result
+    with profiling:
+        for timestamp, rows in ticks:
+            # Update prices for each pair in this timestamp
+            market_data = {
+                "fee": fee,
+            }
+            for pair, data_dict in rows:
+                # Add fee information to market data so strategies can access it
+                market_data[pair] = data_dict
+                update_market(pair, data_dict)
+
+            # Get strategy decision based on all available market data and current balances
+            orders = on_data(market_data, trader.balances)
+
+            # Execute and record the tick's orders
+            execute_batch(orders, timestamp, atomic_orders)
+
+            mark_to_market()
+
+    trader.equity_history[initial_sample] = initial_portfolio_value(
+        initial_balances, trader.first_prices
+    )
+    if trader.balances is not balances:
+        trader.sync_balances(balances)
+    return to_frame(id_generator)
@@ -0,0 +1,173 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from backtest import ENGINES, load_hyperparameters, run_backtest
+from instrumentation import BacktestProfiler
+from registry import available_strategies, load_strategy
+
+
+DATA = Path(__file__).parent / "kaggle" / "input" / "config" / "test.csv"
+HYPERPARAMETERS = DATA.with_name("hyperparameters.json")
+
+RESULTS_DIR = Path(__file__).parent / "benchmarks"
+
+# Metrics reported by --compare
+COMPARED = ["p50_us", "p99_us", "max_us", "ticks_per_s", "alloc_peak_bytes_mean"]
+
+
+def measure_latency(strategy_cls, combined_data, fee, balances, engine="numpy"):
+    """Replay the data once, timing every ``on_data`` call"""
+    profiler = BacktestProfiler()
+    start = time.perf_counter()
+    run_backtest(
+        combined_data, fee, dict(balances), strategy_cls(), engine, profiler=profiler
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies = np.asarray(profiler.latencies["on_data"], dtype=np.float64) / 1e3
+    return {
+        "ticks": len(latencies),
+        "p50_us": float(np.percentile(latencies, 50)),
+        "p99_us": float(np.percentile(latencies, 99)),
+        "max_us": float(latencies.max()),
+        "mean_us": float(latencies.mean()),
+        "ticks_per_s": len(latencies) / elapsed,
+    }
+
+
+def measure_allocations(strategy_cls, combined_data, fee, balances, engine="numpy"):
+    """Replay the data under tracemalloc, measuring each ``on_data`` call.
+
+    ``peak`` is the most memory a call had allocated at once, ``retained``
+    what it still held on return, e.g. a growing history.
+    """
+    strategy = strategy_cls()
+    peaks, retained = [], []
+
+    def on_data(market_data, balances):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        orders = strategy.on_data(market_data, balances)
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(current - before)
+        return orders
+
+    tracemalloc.start()
+    try:
+        run_backtest(
+            combined_data, fee, dict(balances), SimpleNamespace(on_data=on_data), engine
+        )
+    finally:
+        tracemalloc.stop()
+
+    peaks = np.asarray(peaks, dtype=np.float64)
+    return {
+        "alloc_peak_bytes_mean": float(peaks.mean()),
+        "alloc_peak_bytes_p99": float(np.percentile(peaks, 99)),
+        "retained_bytes_total": int(np.sum(retained)),
+    }
+
+
+def benchmark(names, combined_data, fee, balances, engine="numpy"):
+    """Latency, throughput and allocation figures for each named strategy.
+
+    ``engine`` is a tick engine of ``ENGINES``: the vectorized engine never
+    calls ``on_data``, so there is nothing to measure.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {list(ENGINES)}")
+    results = {}
+    for name in names:
+        strategy_cls = load_strategy(name)
+        results[name] = {
+            **measure_latency(strategy_cls, combined_data.copy(), fee, balances, engine),
+            **measure_allocations(
+                strategy_cls, combined_data.copy(), fee, balances, engine
+            ),
+        }
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Relative change of the COMPARED metrics against a baseline run"""
+    rows = {}
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        rows[name] = {
+            f"{metric} %": (metrics[metric] / baseline[name][metric] - 1) * 100
+            for metric in COMPARED
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="on_data latency benchmark")
+    parser.add_argument("strategies", nargs="*", help="Default: every strategy")
+    parser.add_argument("--data", type=Path, default=DATA)
+    parser.add_argument("--hyperparameters", type=Path, default=HYPERPARAMETERS)
+    parser.add_argument(
+        "--engine",
+        default="numpy",
+        choices=list(ENGINES),
+        help="Tick replay engine the strategies' on_data is timed under",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="JSON results file (default: benchmarks/<rev>.json)"
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="Results of a previous run to compare against"
+    )
+    args = parser.parse_args()
+
+    fee, balances = load_hyperparameters(args.hyperparameters)
+    combined_data = pd.read_csv(args.data)
+    names = args.strategies or available_strategies()
+
+    results = benchmark(names, combined_data, fee, balances, args.engine)
+    revision = git_revision()
+    output = args.output or RESULTS_DIR / f"{revision or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "revision": revision,
+                "python": platform.python_version(),
+                "data": str(args.data),
+                "engine": args.engine,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+    table = pd.DataFrame.from_dict(results, orient="index")
+    print(table.to_string(float_format="{:.1f}".format))
+    print(f"\nResults written to {output}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        print()
+        print(compare(results, baseline).to_string(float_format="{:+.1f}".format))
@@ -0,0 +1,99 @@
+import hashlib
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+CACHE_DIR = Path(__file__).parent / ".cache" / "market_data"
+
+# Columns stored as float64 .npy files, timestamp and symbol are encoded
+NUMERIC_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_digest(path, cache_dir=CACHE_DIR):
+    """Content digest of ``path``, re-hashed only when its size or mtime change"""
+    path = Path(path).resolve()
+    index_path = Path(cache_dir) / "index.json"
+    index = json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    stat = path.stat()
+    entry = index.get(str(path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+
+    digest = file_digest(path)
+    index[str(path)] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": digest,
+    }
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    index_path.write_text(json.dumps(index, indent=2))
+    return digest
+
+
+def build_cache(csv_path, target_dir):
+    """Convert a market data CSV into one .npy file per column.
+
+    Rows are stably sorted by timestamp; timestamps are stored as int64
+    nanoseconds since the epoch and symbols as int16 codes into the label
+    list of manifest.json. The CSV row ``id`` is not kept.
+    """
+    combined_data = pd.read_csv(csv_path)
+    combined_data.sort_values("timestamp", kind="stable", inplace=True, ignore_index=True)
+
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamps = pd.to_datetime(combined_data["timestamp"]).to_numpy("datetime64[ns]")
+    np.save(target_dir / "timestamp.npy", timestamps.view(np.int64))
+
+    codes, symbols = pd.factorize(combined_data["symbol"], sort=True)
+    np.save(target_dir / "symbol.npy", codes.astype(np.int16))
+
+    for column in NUMERIC_COLUMNS:
+        np.save(target_dir / f"{column}.npy", combined_data[column].to_numpy(np.float64))
+
+    manifest = {
+        "source": str(csv_path),
+        "rows": len(combined_data),
+        "symbols": list(symbols),
+        "columns": ["timestamp", *NUMERIC_COLUMNS, "symbol"],
+    }
+    # Written last: a directory without a manifest is an incomplete cache
+    (target_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+
+def load_market_data(csv_path, cache_dir=CACHE_DIR):
+    """Load market data from the columnar cache, building it on first use.
+
+    The cache is keyed by the CSV's content hash. Columns are memory-mapped
+    read-only, so numeric data is not copied and loading is near-instant.
+
+    Returns:
+        DataFrame sorted by timestamp with ``timestamp`` (datetime64[ns]),
+        open/high/low/close/volume (float64) and ``symbol`` (categorical)
+    """
+    target_dir = Path(cache_dir) / source_digest(csv_path, cache_dir)[:16]
+    if not (target_dir / "manifest.json").exists():
+        build_cache(csv_path, target_dir)
+    manifest = json.loads((target_dir / "manifest.json").read_text())
+
+    def column(name):
+        return np.load(target_dir / f"{name}.npy", mmap_mode="r")
+
+    data = {"timestamp": column("timestamp").view("datetime64[ns]")}
+    for name in NUMERIC_COLUMNS:
+        data[name] = column(name)
+    data["symbol"] = pd.Categorical.from_codes(column("symbol"), manifest["symbols"])
+    return pd.DataFrame(data, copy=False)[manifest["columns"]]
@@ -0,0 +1,379 @@
+from collections import deque
+import math
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size float64 ring buffer.
+
+    ``push`` overwrites the oldest value once the buffer is full and returns
+    it, so rolling indicators can update their aggregates in O(1).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buffer = np.zeros(self.capacity, dtype=np.float64)
+        self._index = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self):
+        return self._count == self.capacity
+
+    @property
+    def wrapped(self):
+        """True right after the write position went back to the start"""
+        return self._index == 0 and self.full
+
+    def push(self, value):
+        """Store ``value`` and return the evicted one (``None`` while filling)"""
+        evicted = self._buffer[self._index] if self.full else None
+        self._buffer[self._index] = value
+        self._index = (self._index + 1) % self.capacity
+        if not self.full:
+            self._count += 1
+        return evicted
+
+    def last(self):
+        return self._buffer[(self._index - 1) % self.capacity]
+
+    def values(self):
+        """Return the stored values, oldest first (a copy)"""
+        if not self.full:
+            return self._buffer[: self._count].copy()
+        return np.roll(self._buffer, -self._index)
+
+    def raw(self):
+        """Return the stored values in storage order (no copy)"""
+        return self._buffer[: self._count]
+
+
+class PriceHistory:
+    """Fixed-capacity history of several fields (OHLCV) of a price series.
+
+    Every value is written twice, at ``i`` and ``i + capacity`` of a buffer
+    twice the capacity, so the last ``capacity`` values of a field are
+    always one contiguous slice: windows are zero-copy views in time order,
+    and an update writes in place instead of allocating. The views are
+    overwritten by later updates, copy them to keep them.
+    """
+
+    def __init__(self, capacity, fields=("open", "high", "low", "close", "volume")):
+        self.capacity = int(capacity)
+        self.fields = tuple(fields)
+        self._rows = {field: i for i, field in enumerate(self.fields)}
+        self._buffer = np.zeros((len(self.fields), 2 * self.capacity), dtype=np.float64)
+        self._index = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def update(self, data):
+        """Append one bar, ``data`` maps each field to its value"""
+        values = [data[field] for field in self.fields]
+        self._buffer[:, self._index] = values
+        self._buffer[:, self._index + self.capacity] = values
+        self._index = (self._index + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def window(self, field, n=None):
+        """View of the last ``n`` values of ``field`` (all by default), oldest first"""
+        n = self._count if n is None else min(n, self._count)
+        end = self._index + self.capacity if self._count == self.capacity else self._index
+        return self._buffer[self._rows[field], end - n : end]
+
+    def __getitem__(self, field):
+        return self.window(field)
+
+
+class RollingSum:
+    """Sum of the last ``window`` values.
+
+    The running sum is recomputed from the buffer every time it wraps, which
+    keeps floating point drift bounded at an amortised O(1) cost.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._buffer = RingBuffer(window)
+        self.value = 0.0
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def update(self, x):
+        evicted = self._buffer.push(x)
+        if self._buffer.wrapped:
+            self.value = float(self._buffer.raw().sum())
+        else:
+            self.value += x - (evicted if evicted is not None else 0.0)
+        return self.value
+
+
+class SMA:
+    """Simple moving average, same as ``np.mean(prices[-window:])``"""
+
+    def __init__(self, window):
+        self.window = window
+        self._sum = RollingSum(window)
+        self.value = math.nan
+
+    def __len__(self):
+        return len(self._sum)
+
+    def update(self, price):
+        self.value = self._sum.update(price) / len(self._sum)
+        return self.value
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first window"""
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self._seed = SMA(window)
+        self.value = math.nan
+
+    def update(self, price):
+        if len(self._seed) < self.window:
+            self.value = self._seed.update(price)
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class RollingStd:
+    """Population standard deviation of the last ``window`` values.
+
+    Uses Welford's update extended to a sliding window, same as
+    ``np.std(prices[-window:])``.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._buffer = RingBuffer(window)
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.value = math.nan
+
+    def update(self, x):
+        evicted = self._buffer.push(x)
+        n = len(self._buffer)
+        if self._buffer.wrapped:
+            values = self._buffer.raw()
+            self.mean = float(values.mean())
+            self._m2 = float(((values - self.mean) ** 2).sum())
+        elif evicted is None:
+            delta = x - self.mean
+            self.mean += delta / n
+            self._m2 += delta * (x - self.mean)
+        else:
+            old_mean = self.mean
+            self.mean += (x - evicted) / n
+            self._m2 += (x - evicted) * (x - self.mean + evicted - old_mean)
+        self.value = math.sqrt(max(self._m2, 0.0) / n)
+        return self.value
+
+
+class RSI:
+    """Relative strength index over the last ``window`` price changes.
+
+    ``smoothing="simple"`` averages gains and losses over the window, which
+    is what the strategies' ``calculate_rsi`` does; ``smoothing="wilder"``
+    uses Wilder's recursive smoothing once the first window is filled.
+    """
+
+    def __init__(self, window, smoothing="simple"):
+        if smoothing not in ("simple", "wilder"):
+            raise ValueError(f"Unknown RSI smoothing {smoothing!r}")
+        self.window = window
+        self.smoothing = smoothing
+        self._gains = SMA(window)
+        self._losses = SMA(window)
+        self._avg_gain = math.nan
+        self._avg_loss = math.nan
+        self._prev = None
+        self.value = math.nan
+
+    def update(self, price):
+        if self._prev is None:
+            self._prev = price
+            return self.value
+
+        gain = max(0, price - self._prev)
+        loss = max(0, self._prev - price)
+        self._prev = price
+
+        if self.smoothing == "wilder" and len(self._gains) == self.window:
+            self._avg_gain = (self._avg_gain * (self.window - 1) + gain) / self.window
+            self._avg_loss = (self._avg_loss * (self.window - 1) + loss) / self.window
+        else:
+            self._avg_gain = self._gains.update(gain)
+            self._avg_loss = self._losses.update(loss)
+
+        # RSI is 100 when there are no losses
+        if self._avg_loss == 0:
+            self.value = 100
+        else:
+            rs = self._avg_gain / self._avg_loss
+            self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class OBV:
+    """On balance volume summed over the last ``window`` price changes"""
+
+    def __init__(self, window):
+        self.window = window
+        self._sum = RollingSum(window)
+        self._prev = None
+        self.value = 0.0
+
+    def update(self, price, volume):
+        if self._prev is not None:
+            if price > self._prev:
+                self.value = self._sum.update(volume)
+            elif price < self._prev:
+                self.value = self._sum.update(-volume)
+            else:
+                self.value = self._sum.update(0)
+        self._prev = price
+        return self.value
+
+
+class ADL:
+    """Volume weighted relative price change summed over ``window`` changes"""
+
+    def __init__(self, window):
+        self.window = window
+        self._sum = RollingSum(window)
+        self._prev = None
+        self.value = 0.0
+
+    def update(self, price, volume):
+        if self._prev is not None:
+            if price != self._prev:
+                self.value = self._sum.update(volume * (price - self._prev) / self._prev)
+            else:
+                self.value = self._sum.update(0)
+        self._prev = price
+        return self.value
+
+
+class ATR:
+    """Average true range over the last ``window`` true ranges.
+
+    Like ``RSI``, the window counts changes, not bars: the strategies'
+    ``calculate_atr(prices, window)`` reads ``window`` bars, so it averages
+    ``window - 1`` true ranges and equals ``ATR(window - 1)``.
+    ``smoothing="wilder"`` switches to Wilder's recursive average once the
+    first window is filled.
+    """
+
+    def __init__(self, window, smoothing="simple"):
+        if smoothing not in ("simple", "wilder"):
+            raise ValueError(f"Unknown ATR smoothing {smoothing!r}")
+        self.window = window
+        self.smoothing = smoothing
+        self._ranges = SMA(window)
+        self._prev_close = None
+        self.value = math.nan
+
+    def update(self, high, low, close):
+        if self._prev_close is not None:
+            true_range = max(
+                high - low,
+                abs(high - self._prev_close),
+                abs(low - self._prev_close),
+            )
+            if self.smoothing == "wilder" and len(self._ranges) == self.window:
+                self.value = (self.value * (self.window - 1) + true_range) / self.window
+            else:
+                self.value = self._ranges.update(true_range)
+        self._prev_close = close
+        return self.value
+
+
+class VWAP:
+    """Volume weighted average price over the last ``window`` ticks"""
+
+    def __init__(self, window):
+        self.window = window
+        self._pv = RollingSum(window)
+        self._volume = RollingSum(window)
+        self.value = math.nan
+
+    def update(self, price, volume):
+        pv = self._pv.update(price * volume)
+        v = self._volume.update(volume)
+        self.value = pv / v if v else math.nan
+        return self.value
+
+
+class Stochastic:
+    """Stochastic oscillator ``(close - lowest) / (highest - lowest)``.
+
+    Rolling extremes are kept in monotonic deques (amortised O(1)). Without
+    ``high``/``low`` the close is used, as ``calculate_stochastic_oscillator``
+    does.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._ticks = 0
+        self._lows = deque()
+        self._highs = deque()
+        self.value = math.nan
+
+    def update(self, close, high=None, low=None):
+        high = close if high is None else high
+        low = close if low is None else low
+        i = self._ticks
+        self._ticks += 1
+
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((i, low))
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((i, high))
+
+        oldest = i - self.window + 1
+        if self._lows[0][0] < oldest:
+            self._lows.popleft()
+        if self._highs[0][0] < oldest:
+            self._highs.popleft()
+
+        lowest_low = self._lows[0][1]
+        highest_high = self._highs[0][1]
+        span = highest_high - lowest_low
+        self.value = (close - lowest_low) / span if span else math.nan
+        return self.value
+
+
+class CCI:
+    """Commodity channel index over the last ``window`` typical prices.
+
+    The moving average is O(1); the mean absolute deviation depends on the
+    current average, so it is a single vectorised pass over the ring buffer.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._typical = RingBuffer(window)
+        self._sma = SMA(window)
+        self.value = math.nan
+
+    def update(self, high, low, close):
+        typical_price = (high + low + close) / 3
+        self._typical.push(typical_price)
+        sma = self._sma.update(typical_price)
+        md = np.abs(self._typical.raw() - sma).mean()
+        self.value = (typical_price - sma) / (0.015 * md) if md else math.nan
+        return self.value
@@ -0,0 +1,154 @@
+import cProfile
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+import numpy as np
+import pandas as pd
+
+
+# Latency histogram bin edges in microseconds, log spaced from 1us to 1s
+LATENCY_BINS_US = np.logspace(0, 6, 13)
+
+
+class BacktestProfiler:
+    """Opt-in instrumentation for ``run_backtest``.
+
+    Records wall time and call counts per stage of the tick loop (tick
+    replay, ``update_market``, ``on_data``, ``execute_batch``, ...) and the
+    latency of every ``on_data`` call. With ``stats_path`` the loop also
+    runs under cProfile and the stats are dumped there, to be read with
+    ``print_profile``.
+    """
+
+    def __init__(self, stats_path=None, latency_stages=("on_data",)):
+        self.stats_path = stats_path
+        self.latency_stages = set(latency_stages)
+        self.totals = {}
+        self.calls = {}
+        self.latencies = {stage: [] for stage in self.latency_stages}
+
+    def record(self, stage, elapsed_ns):
+        self.totals[stage] = self.totals.get(stage, 0) + elapsed_ns
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+        if stage in self.latency_stages:
+            self.latencies[stage].append(elapsed_ns)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as one call of stage ``name``"""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def timed(self, stage, func):
+        """Wrap ``func`` so that every call is recorded under ``stage``"""
+        record = self.record
+        clock = time.perf_counter_ns
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, clock() - start)
+
+        return wrapper
+
+    def timed_iter(self, stage, iterable):
+        """Yield from ``iterable``, recording the time spent producing each item"""
+        iterator = iter(iterable)
+        clock = time.perf_counter_ns
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(stage, clock() - start)
+                return
+            self.record(stage, clock() - start)
+            yield item
+
+    @contextmanager
+    def profiling(self):
+        """Run the block under cProfile if a ``stats_path`` was given"""
+        if self.stats_path is None:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(self.stats_path)
+
+    def summary(self):
+        """DataFrame of calls, total and mean time per stage, slowest first"""
+        table = pd.DataFrame(
+            {
+                "calls": pd.Series(self.calls, dtype="int64"),
+                "total_s": pd.Series(self.totals, dtype="float64") / 1e9,
+            }
+        )
+        table["mean_us"] = table["total_s"] / table["calls"] * 1e6
+        table["share_%"] = table["total_s"] / table["total_s"].sum() * 100
+        return table.sort_values("total_s", ascending=False)
+
+    def latency_histogram(self, stage="on_data", bins=LATENCY_BINS_US):
+        """Histogram of the per-call latency of ``stage``, in microseconds"""
+        latencies = np.asarray(self.latencies[stage], dtype=np.float64) / 1e3
+        counts, edges = np.histogram(latencies, bins=bins)
+        # Count out-of-range calls in the outer bins
+        counts[0] += np.count_nonzero(latencies < edges[0])
+        counts[-1] += np.count_nonzero(latencies > edges[-1])
+        return pd.DataFrame(
+            {"from_us": edges[:-1], "to_us": edges[1:], "calls": counts}
+        )
+
+    def latency_percentiles(self, stage="on_data", percentiles=(50, 90, 99)):
+        latencies = np.asarray(self.latencies[stage], dtype=np.float64) / 1e3
+        if not len(latencies):
+            return {}
+        values = np.percentile(latencies, percentiles)
+        result = {f"p{p}_us": value for p, value in zip(percentiles, values)}
+        result["max_us"] = latencies.max()
+        return result
+
+    def report(self, file=None):
+        """Print the stage summary and the latency histograms"""
+        file = sys.stdout if file is None else file
+        print("Stage timings:", file=file)
+        print(self.summary().to_string(float_format="{:.3f}".format), file=file)
+        for stage in sorted(self.latency_stages):
+            if not self.latencies[stage]:
+                continue
+            percentiles = ", ".join(
+                f"{k}={v:.1f}" for k, v in self.latency_percentiles(stage).items()
+            )
+            print(f"\n{stage} latency ({percentiles}):", file=file)
+            histogram = self.latency_histogram(stage)
+            print(
+                histogram[histogram["calls"] > 0].to_string(
+                    index=False, float_format="{:.1f}".format
+                ),
+                file=file,
+            )
+        if self.stats_path is not None:
+            print(f"\ncProfile stats written to {self.stats_path}", file=file)
+
+
+def print_profile(stats_path, limit=30):
+    """Print cProfile stats sorted by cumulative time, with their callers"""
+    p = pstats.Stats(str(stats_path))
+    p.sort_stats("cumulative")
+    p.print_stats(limit)
+    p.print_callers(limit)
+
+
+if __name__ == "__main__":
+    print_profile(sys.argv[1] if len(sys.argv) > 1 else "backtest.stats")
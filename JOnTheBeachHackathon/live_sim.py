@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from backtest import ENGINES, TRADERS, load_hyperparameters
+from data_cache import load_market_data
+from instrumentation import BacktestProfiler
+from journal import OrderJournal, random_ids
+from registry import load_strategy
+
+
+DATA = Path(__file__).parent / "kaggle" / "input" / "config" / "test.csv"
+
+
+class ReplayClock:
+    """When the replay feed publishes each tick.
+
+    Ticks are ``interval`` seconds apart on the feed's clock, played back
+    ``speed`` times faster than real time: ``speed=1`` is a live feed,
+    ``speed=10`` an accelerated one, and ``speed=None`` publishes every
+    tick as soon as the strategy has taken the previous one.
+    """
+
+    def __init__(self, interval=1.0, speed=1.0):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"speed must be positive, got {speed}")
+        self.interval = interval
+        self.speed = speed
+        self.start = None
+
+    @property
+    def paced(self):
+        return self.speed is not None
+
+    def begin(self):
+        self.start = time.perf_counter()
+
+    def due(self, tick):
+        """Wall time, from ``time.perf_counter``, at which ``tick`` is published"""
+        return self.start + tick * self.interval / self.speed
+
+
+async def replay_feed(ticks, queue, clock, trader, stats):
+    """Publish ``(tick, due, timestamp, rows)`` items on ``queue``, then None.
+
+    Prices are the market's: the trader's are updated from every tick when
+    it is due, whether or not the strategy gets to see it. On a paced clock
+    a tick is missed when the next one is already due by the time the feed
+    gets to publish it, i.e. the strategy was still busy with an older one.
+    """
+    clock.begin()
+    for tick, (timestamp, rows) in enumerate(ticks):
+        if clock.paced:
+            now = time.perf_counter()
+            if clock.due(tick + 1) <= now:
+                for pair, data_dict in rows:
+                    trader.update_market(pair, data_dict)
+                stats["missed"] += 1
+                continue
+            due = clock.due(tick)
+        else:
+            due = now = time.perf_counter()
+        # Always yields, so the strategy acts on the previous tick before
+        # the market moves on
+        await asyncio.sleep(max(due - now, 0))
+
+        for pair, data_dict in rows:
+            trader.update_market(pair, data_dict)
+        await queue.put((tick, due, timestamp, rows))
+        stats["published"] += 1
+    await queue.put(None)
+
+
+async def run_strategy(queue, strategy, trader, fee, interval, profiler, stats):
+    """Take ticks off ``queue`` and execute the strategy's orders.
+
+    ``on_data`` runs on the event loop, as in a single-threaded trading
+    bot, so while it computes the feed cannot publish: of the ticks that
+    came due meanwhile, only the latest is published once it returns.
+    Decision latency is measured from the moment a tick was due on the feed
+    clock to the return of ``on_data``.
+    """
+    clock = time.perf_counter
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        tick, due, timestamp, rows = item
+        market_data = {"fee": fee}
+        for pair, data_dict in rows:
+            market_data[pair] = data_dict
+
+        start = clock()
+        orders = strategy.on_data(market_data, trader.balances)
+        end = clock()
+        profiler.record("on_data", int((end - start) * 1e9))
+        profiler.record("decision", int((end - due) * 1e9))
+        if interval is not None and end - due > interval:
+            stats["late"] += 1
+        stats["processed"] += 1
+
+        trader.execute_batch(orders, timestamp)
+        trader.mark_to_market()
+
+
+async def simulate(
+    combined_data,
+    fee,
+    balances,
+    strategy,
+    clock=None,
+    engine="numpy",
+    trader_type="dict",
+):
+    """Replay market data to ``strategy`` over an asyncio queue on ``clock``.
+
+    Returns:
+        ``(orders, stats)``: the order log of the ticks the strategy saw,
+        and the feed statistics, see ``simulate_live``
+    """
+    clock = ReplayClock() if clock is None else clock
+    journal = OrderJournal()
+    trader = TRADERS[trader_type](balances, fee, None, journal)
+    profiler = BacktestProfiler(latency_stages=("on_data", "decision"))
+    stats = {"published": 0, "processed": 0, "missed": 0, "late": 0}
+    queue = asyncio.Queue(maxsize=1)
+
+    ticks = ENGINES[engine](combined_data)
+    # A decision is late when it takes longer than a tick interval of wall time
+    interval = clock.interval / clock.speed if clock.paced else None
+    await asyncio.gather(
+        replay_feed(ticks, queue, clock, trader, stats),
+        run_strategy(queue, strategy, trader, fee, interval, profiler, stats),
+    )
+
+    if trader.balances is not balances:
+        trader.sync_balances(balances)
+    stats["on_data"] = profiler.latency_percentiles("on_data")
+    stats["decision"] = profiler.latency_percentiles("decision")
+    return journal.to_frame(random_ids), stats
+
+
+def simulate_live(combined_data, fee, balances, strategy, clock=None, **options):
+    """Run ``simulate`` in a fresh event loop.
+
+    The stats count the ticks ``published`` by the feed, those the strategy
+    ``processed`` and ``missed``, and, on a paced clock, the decisions that
+    came ``late``, more than one tick interval after their tick was due.
+    ``on_data`` and ``decision`` hold the latency percentiles in
+    microseconds.
+    """
+    return asyncio.run(
+        simulate(combined_data, fee, balances, strategy, clock, **options)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay market data to a strategy on a live-style clock"
+    )
+    parser.add_argument("strategy", nargs="?", default="strategy9")
+    parser.add_argument("--data", type=Path, default=DATA)
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="Seconds between ticks"
+    )
+    clock_group = parser.add_mutually_exclusive_group()
+    clock_group.add_argument(
+        "--speed", type=float, default=1.0, help="Playback speed, 1 is real time"
+    )
+    clock_group.add_argument(
+        "--asap", action="store_true", help="Publish ticks as fast as possible"
+    )
+    args = parser.parse_args()
+
+    fee, balances = load_hyperparameters(args.data.with_name("hyperparameters.json"))
+    clock = ReplayClock(args.interval, None if args.asap else args.speed)
+    orders, stats = simulate_live(
+        load_market_data(args.data), fee, balances, load_strategy(args.strategy)(), clock
+    )
+    print(json.dumps(stats, indent=4, default=float))
+    print(f"{len(orders)} orders")
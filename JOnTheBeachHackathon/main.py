@@ -1,8 +1,13 @@
+import argparse
 import pandas as pd
 import json
 from pathlib import Path
-from backtest import run_backtest
-from metrics import calculate_metrics
+from data_cache import load_market_data, source_digest
+from instrumentation import BacktestProfiler
+from journal import random_ids, seeded_ids
+from registry import available_strategies, load_strategy
+from result_cache import ResultCache, result_key
+from sweep import evaluate, flatten_metrics, run_parallel
 
 DATA_PATH = Path("./kaggle/input")
 
@@ -13,36 +18,140 @@ FEE = HYPERPARAMETERS.get("fee", 3.0) / 10000
 BALANCE_FIAT = HYPERPARAMETERS.get("fiat_balance", 10000.0)
 BALANCE_TOKEN1 = HYPERPARAMETERS.get("token1_balance", 0.0)
 BALANCE_TOKEN2 = HYPERPARAMETERS.get("token2_balance", 0.0)
-# INPUT = list(DATA_PATH.glob("*/test.csv"))[0]
-INPUT = list(DATA_PATH.glob("*/dataset02.csv"))[0]
+BALANCES = {
+    "fiat": BALANCE_FIAT,
+    "token_1": BALANCE_TOKEN1,
+    "token_2": BALANCE_TOKEN2,
+}
+DATASET = "dataset02.csv"
 
 OUTPUT = "submission.csv"
 
-combined_data = pd.read_csv(INPUT)
-
-# Run the backtest on the provided test data with a fee of 0.02% and initial balances of 10,000 fiat, and 0 token_1 and token_2
-result = run_backtest(
-    combined_data,
-    FEE,
-    {
-        "fiat": BALANCE_FIAT,
-        "token_1": BALANCE_TOKEN1,
-        "token_2": BALANCE_TOKEN2,
-    },
-)
 
-# Calculate metrics
-metrics = calculate_metrics(
-    result,
-    combined_data,
-    FEE,
-    {
-        "fiat": BALANCE_FIAT,
-        "token_1": BALANCE_TOKEN1,
-        "token_2": BALANCE_TOKEN2,
-    },
-)
-print(json.dumps(metrics, indent=4))
+def backtest_strategies(
+    names, combined_data, max_workers=None, profiler=None, cache=None, data_digest=None
+):
+    """Backtest every named strategy on the same data.
+
+    A single strategy runs in-process, instrumented by ``profiler`` if
+    given; several run in parallel worker processes that share the market
+    data. With a ResultCache, strategies whose code, params and data are
+    unchanged since a previous run are served from it instead.
+
+    Returns:
+        {name: (metrics, journal)}
+    """
+    strategies = {name: (load_strategy(name), {}) for name in names}
+    results = {}
+    keys = {}
+    if cache is not None and profiler is None:
+        for name, (strategy_cls, params) in strategies.items():
+            keys[name] = result_key(strategy_cls, params, FEE, BALANCES, data_digest)
+            results[name] = cache.get(keys[name])
+        results = {name: result for name, result in results.items() if result}
+    pending = {name: job for name, job in strategies.items() if name not in results}
+
+    if len(pending) == 1:
+        [(name, (strategy_cls, params))] = pending.items()
+        results[name] = evaluate(
+            strategy_cls,
+            params,
+            combined_data,
+            FEE,
+            BALANCES,
+            keep_orders=True,
+            profiler=profiler,
+        )
+    elif pending:
+        results.update(
+            run_parallel(
+                pending, combined_data, FEE, BALANCES, max_workers, keep_orders=True
+            )
+        )
+
+    for name in keys.keys() & pending.keys():
+        cache.put(keys[name], results[name])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest hackathon strategies")
+    parser.add_argument(
+        "strategies",
+        nargs="*",
+        default=["strategy9"],
+        help="Strategy modules to backtest, e.g. strategy strategy4 strategy9",
+    )
+    parser.add_argument(
+        "--all", action="store_true", help="Backtest every strategy*.py module"
+    )
+    parser.add_argument(
+        "--input", type=Path, help=f"Market data CSV (default: */{DATASET})"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage timings and on_data latencies (single strategy)",
+    )
+    parser.add_argument(
+        "--profile-stats",
+        type=Path,
+        help="Also dump cProfile stats here, read with instrumentation.py",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Always re-run the backtests"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed the order ids, so identical runs write identical submissions",
+    )
+    args = parser.parse_args()
+
+    names = available_strategies() if args.all else args.strategies
+    profiler = None
+    if args.profile or args.profile_stats:
+        if len(names) != 1:
+            parser.error("--profile needs a single strategy")
+        profiler = BacktestProfiler(args.profile_stats)
+    input_path = args.input or list(DATA_PATH.glob(f"*/{DATASET}"))[0]
+
+    # Load the data once (sorted, memory-mapped), every strategy replays the same frame
+    combined_data = load_market_data(input_path)
+
+    cache = None if args.no_cache else ResultCache()
+    results = backtest_strategies(
+        names,
+        combined_data,
+        args.workers,
+        profiler,
+        cache,
+        source_digest(input_path),
+    )
+    id_generator = random_ids if args.seed is None else seeded_ids(args.seed)
+
+    if len(names) == 1:
+        metrics, journal = results[names[0]]
+        print(json.dumps(metrics, indent=4))
+        if profiler is not None:
+            profiler.report()
+        # Output the backtest result to a CSV file for submission
+        journal.to_frame(id_generator).to_csv(OUTPUT, index=False)
+        return
+
+    # Comparative report, best score first
+    report = pd.DataFrame(
+        {name: flatten_metrics(results[name][0]) for name in names}
+    ).T.sort_values("Score", ascending=False)
+    print(report.to_string())
+
+    for name in names:
+        results[name][1].to_frame(id_generator).to_csv(
+            f"submission_{name}.csv", index=False
+        )
+
 
-# Output the backtest result to a CSV file for submission
-result.to_csv(OUTPUT, index=False)
+if __name__ == "__main__":
+    main()
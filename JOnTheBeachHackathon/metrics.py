@@ -1,8 +1,46 @@
+import numpy as np
 import pandas as pd
+from journal import OrderJournal
 
 
-def calculate_metrics(backtest_result, market_data, fee, initial_balance):
-    """Calculate all metrics"""
+def _running_total(initial, deltas):
+    """``initial`` followed by the running sum after each of ``deltas``.
+
+    The values are added left to right, so the result is the same as adding
+    the deltas one by one in a loop.
+    """
+    return np.cumsum(np.concatenate(([float(initial)], deltas)))
+
+
+def _max_drawdown(returns):
+    """Largest peak-to-trough fall of the compounded ``returns``"""
+    # NaN returns are skipped: they keep the previous cumulative value
+    cumulative_returns = np.nancumprod(1 + returns)
+    if not np.isfinite(cumulative_returns).any():
+        return np.nan
+    peak = np.maximum.accumulate(cumulative_returns)
+    with np.errstate(invalid="ignore"):
+        drawdown = (cumulative_returns / peak) - 1
+    return np.nanmin(drawdown)
+
+
+def calculate_metrics(
+    backtest_result, market_data, fee, initial_balance, equity_curve=None
+):
+    """Calculate all metrics
+
+    ``backtest_result`` is either the submission DataFrame or the
+    OrderJournal filled by ``run_backtest``; the journal columns are wrapped
+    without copying.
+
+    With the ``equity_curve`` recorded by ``run_backtest`` (an EquityCurve
+    or an array of per-timestamp portfolio values), the Sharpe ratio and max
+    drawdown are computed from the mark-to-market curve; otherwise they are
+    estimated from the portfolio value after each trade.
+    """
+    if isinstance(backtest_result, OrderJournal):
+        backtest_result = pd.DataFrame(backtest_result.columns(), copy=False)
+
     # Rename symbol to pair in market_data
     market_data = market_data.rename(columns={"symbol": "pair"})
 
@@ -12,64 +50,58 @@ def calculate_metrics(backtest_result, market_data, fee, initial_balance):
         market_data[["timestamp", "pair", "close"]],
         on=["timestamp", "pair"],
     )
-    # Initialize balances
-    fiat_balance = initial_balance["fiat"]
-    token1_balance = initial_balance["token_1"]
-    token2_balance = initial_balance["token_2"]
-
-    # Initialize metrics
-    pnl = 0
-    turnover = 0
-    trade_count = 0
-    fees_paid = 0
-    daily_returns = []
-
-    # Iterate over trades
-    for index, row in merged_data.iterrows():
-        # Get trade details
-        pair = row["pair"]
-        side = row["side"]
-        qty = row["qty"]
-        price = row["close"]
-
-        # Update balances and metrics
-        if side == "buy":
-            if pair == "token_1/fiat":
-                fiat_balance -= qty * price * (1 + fee)
-                token1_balance += qty
-            elif pair == "token_2/fiat":
-                fiat_balance -= qty * price * (1 + fee)
-                token2_balance += qty
-        elif side == "sell":
-            if pair == "token_1/fiat":
-                fiat_balance += qty * price * (1 - fee)
-                token1_balance -= qty
-            elif pair == "token_2/fiat":
-                fiat_balance += qty * price * (1 - fee)
-                token2_balance -= qty
-
-        # Update metrics
-        turnover += qty * price
-        trade_count += 1
-        fees_paid += qty * price * fee
-
-        # Update PnL
-        pnl = fiat_balance + token1_balance * price + token2_balance * price
-        daily_returns.append(pnl)
+    pair = merged_data["pair"].to_numpy()
+    side = merged_data["side"].to_numpy()
+    qty = merged_data["qty"].to_numpy(dtype=np.float64)
+    price = merged_data["close"].to_numpy(dtype=np.float64)
 
-    # Calculate Sharpe Ratio
-    daily_returns_series = pd.Series(daily_returns)
-    sharpe_ratio = (
-        daily_returns_series.pct_change().mean()
-        / daily_returns_series.pct_change().std()
-        * (252**0.5)
+    # Only trades against fiat move the balances
+    buy = side == "buy"
+    sell = side == "sell"
+    token1_trade = pair == "token_1/fiat"
+    token2_trade = pair == "token_2/fiat"
+    fiat_trade = (buy | sell) & (token1_trade | token2_trade)
+
+    # Signed quantity and fiat flow (fees included) of every trade
+    notional = qty * price
+    signed_qty = np.where(buy, qty, -qty)
+    fiat_flow = np.where(buy, -(notional * (1 + fee)), notional * (1 - fee))
+
+    # Balances before the first and after each trade
+    fiat_balances = _running_total(
+        initial_balance["fiat"], np.where(fiat_trade, fiat_flow, 0.0)
+    )
+    token1_balances = _running_total(
+        initial_balance["token_1"], np.where(fiat_trade & token1_trade, signed_qty, 0.0)
+    )
+    token2_balances = _running_total(
+        initial_balance["token_2"], np.where(fiat_trade & token2_trade, signed_qty, 0.0)
+    )
+
+    # Update metrics
+    turnover = _running_total(0, notional)[-1]
+    trade_count = len(merged_data)
+    fees_paid = _running_total(0, notional * fee)[-1]
+
+    fiat_balance = fiat_balances[-1]
+    token1_balance = token1_balances[-1]
+    token2_balance = token2_balances[-1]
+
+    # PnL after each trade
+    daily_returns = (
+        fiat_balances[1:] + token1_balances[1:] * price + token2_balances[1:] * price
     )
+    pnl = daily_returns[-1] if trade_count else 0
+
+    if equity_curve is not None:
+        daily_returns = getattr(equity_curve, "values", equity_curve)
+
+    # Calculate Sharpe Ratio
+    returns = pd.Series(daily_returns).pct_change()
+    sharpe_ratio = returns.mean() / returns.std() * (252**0.5)
 
     # Calculate Max Drawdown
-    cumulative_returns = (1 + daily_returns_series.pct_change()).cumprod()
-    peak = cumulative_returns.expanding().max()
-    drawdown = (cumulative_returns / peak) - 1
-    max_drawdown = drawdown.min()
+    max_drawdown = _max_drawdown(returns.to_numpy()[1:])
 
     # Calculate HODL Comparison
     hodl_return = (1 - 1) * initial_balance["fiat"]
@@ -0,0 +1,44 @@
+import importlib
+import re
+from pathlib import Path
+
+
+STRATEGY_DIR = Path(__file__).parent
+
+# Strategies registered by name on top of the strategy*.py modules
+_registry = {}
+
+
+def register_strategy(name, strategy_cls):
+    """Make ``strategy_cls`` available to ``load_strategy`` as ``name``"""
+    _registry[name] = strategy_cls
+
+
+def available_strategies():
+    """Names of the strategy*.py modules and registered strategies, in order"""
+
+    def number(name):
+        match = re.fullmatch(r"strategy(\d*)", name)
+        return int(match.group(1) or 1) if match else float("inf")
+
+    modules = [
+        path.stem
+        for path in STRATEGY_DIR.glob("strategy*.py")
+        if re.fullmatch(r"strategy\d*", path.stem)
+    ]
+    return sorted(modules, key=number) + [n for n in _registry if n not in modules]
+
+
+def load_strategy(name):
+    """Return the strategy class for a registered name or strategy module.
+
+    A strategy module exposes a ready-made ``strategy`` instance; its class
+    is returned so every backtest can start from a fresh instance.
+    """
+    if name in _registry:
+        return _registry[name]
+
+    module = importlib.import_module(name)
+    if not hasattr(module, "strategy") or not hasattr(module.strategy, "on_data"):
+        raise ValueError(f"Module {name!r} does not define a strategy with on_data")
+    return type(module.strategy)
@@ -0,0 +1,182 @@
+import ast
+import hashlib
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from sweep import evaluate
+
+
+CACHE_DIR = Path(__file__).parent / ".cache" / "results"
+MAX_BYTES = 256 * 1024 * 1024
+
+# Modules of the backtest path: evaluate and the engine. Their local
+# imports are followed, so e.g. data_cache.py and shared_data.py count too
+ROOT_MODULES = ["sweep", "backtest", "trader", "journal", "metrics"]
+
+HERE = Path(__file__).parent.resolve()
+
+
+def _imported_names(path):
+    """Top-level names of every module ``path`` imports, at any depth of
+    its code (function-level imports included)"""
+    names = set()
+    for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+def _local_modules(*paths):
+    """Source files of ``paths`` and of the modules of this directory they
+    import, transitively"""
+    found = set()
+    pending = [Path(path).resolve() for path in paths]
+    while pending:
+        path = pending.pop()
+        if path in found or not path.exists():
+            continue
+        found.add(path)
+        pending.extend(HERE / f"{name}.py" for name in _imported_names(path))
+    return found
+
+
+def code_digest(strategy_cls):
+    """Hash of the source of the strategy's module, of the backtest path
+    and of every local module they import, transitively (e.g.
+    indicators.py)"""
+    strategy_file = sys.modules[strategy_cls.__module__].__file__
+    roots = [HERE / f"{name}.py" for name in ROOT_MODULES]
+    digest = hashlib.sha256()
+    for path in sorted(_local_modules(strategy_file, *roots)):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def frame_digest(combined_data):
+    """Content hash of a market data DataFrame"""
+    hashes = pd.util.hash_pandas_object(combined_data, index=False)
+    return hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+
+
+def result_key(strategy_cls, params, fee, balances, data_digest, engine="numpy"):
+    """Cache key of one backtest: code, params, fee, balances, data and the
+    tick engine"""
+    payload = json.dumps(
+        {
+            "strategy": f"{strategy_cls.__module__}.{strategy_cls.__qualname__}",
+            "code": code_digest(strategy_cls),
+            "params": params,
+            "fee": fee,
+            "balances": balances,
+            "data": data_digest,
+            "engine": engine,
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of ``(metrics, journal)`` backtest results.
+
+    One pickle per key. Reading an entry refreshes its mtime, and storing
+    one evicts the least recently used entries until the cache fits in
+    ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key):
+        """Cached result for ``key``, or None"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError):
+            # Left truncated or corrupt, e.g. by a killed writer
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return result
+
+    def put(self, key, result):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # Write then rename, so a reader never sees a partial entry
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries beyond ``max_bytes``.
+
+        The most recent entry is always kept, even if larger on its own.
+        """
+        entries = []
+        for path in self.cache_dir.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort(reverse=True)
+
+        total = 0
+        for i, (_, size, path) in enumerate(entries):
+            total += size
+            if total > self.max_bytes and i > 0:
+                path.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.cache_dir.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+
+def cached_evaluate(
+    strategy_cls,
+    params,
+    combined_data,
+    fee,
+    balances,
+    data_digest=None,
+    cache=None,
+    engine="numpy",
+):
+    """``evaluate(..., keep_orders=True)``, served from the cache when possible.
+
+    ``data_digest`` identifies the market data, e.g.
+    ``data_cache.source_digest(csv_path)``; it is computed from the frame
+    when omitted.
+
+    Returns:
+        ``(metrics, journal)``
+    """
+    cache = ResultCache() if cache is None else cache
+    data_digest = frame_digest(combined_data) if data_digest is None else data_digest
+    key = result_key(strategy_cls, params, fee, balances, data_digest, engine)
+
+    result = cache.get(key)
+    if result is None:
+        result = evaluate(
+            strategy_cls, params, combined_data, fee, balances, engine, keep_orders=True
+        )
+        cache.put(key, result)
+    return result
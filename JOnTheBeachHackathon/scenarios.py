@@ -0,0 +1,118 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from backtest import load_hyperparameters
+from data_cache import load_market_data
+from registry import load_strategy
+from sweep import evaluate, flatten_metrics
+
+
+HARNESS_DIR = Path(__file__).parent
+SEARCH_DIRS = [HARNESS_DIR / "kaggle" / "input", HARNESS_DIR / "Data"]
+
+# Columns a CSV needs to be backtested, see run_backtest
+MARKET_DATA_COLUMNS = {"timestamp", "close", "volume", "symbol"}
+
+
+def is_market_data(path):
+    """Whether the CSV at ``path`` has the market data columns"""
+    header = pd.read_csv(path, nrows=0).columns
+    return MARKET_DATA_COLUMNS.issubset(header)
+
+
+def discover_scenarios(search_dirs=SEARCH_DIRS):
+    """Every (dataset CSV, hyperparameters.json) pair under ``search_dirs``.
+
+    Each dataset is paired with every hyperparameters file found, so a
+    strategy can be checked across data regimes and fee/balance settings.
+    """
+    datasets, hyperparameters = [], []
+    for directory in search_dirs:
+        directory = Path(directory)
+        if not directory.is_dir():
+            continue
+        datasets += [p for p in sorted(directory.rglob("*.csv")) if is_market_data(p)]
+        hyperparameters += sorted(directory.rglob("hyperparameters.json"))
+    return [(data, hyper) for data in datasets for hyper in hyperparameters]
+
+
+def _label(path):
+    path = Path(path).resolve()
+    try:
+        return str(path.relative_to(HARNESS_DIR.resolve()))
+    except ValueError:
+        return str(path)
+
+
+def run_scenario(strategy_name, data_path, hyperparameters_path, engine="numpy"):
+    """Backtest a strategy on one dataset with one hyperparameters file"""
+    fee, balances = load_hyperparameters(hyperparameters_path)
+    combined_data = load_market_data(data_path)
+    return evaluate(
+        load_strategy(strategy_name), {}, combined_data, fee, balances, engine
+    )
+
+
+def run_scenarios(strategy_name, scenarios=None, max_workers=None, engine="numpy"):
+    """Backtest ``strategy_name`` on every scenario across a process pool.
+
+    Returns:
+        DataFrame indexed by (dataset, hyperparameters) with one column per
+        metric, see ``metric_matrix`` for a dataset x hyperparameters view
+    """
+    scenarios = discover_scenarios() if scenarios is None else list(scenarios)
+
+    # Build the columnar caches up front, so that workers only map them
+    for data_path in {data for data, _ in scenarios}:
+        load_market_data(data_path)
+
+    rows = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(run_scenario, strategy_name, data, hyper, engine): (
+                _label(data),
+                _label(hyper),
+            )
+            for data, hyper in scenarios
+        }
+        for future in as_completed(futures):
+            rows[futures[future]] = flatten_metrics(future.result())
+
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    if rows:
+        table.index.names = ["dataset", "hyperparameters"]
+        table = table.sort_index()
+    return table
+
+
+def metric_matrix(table, metric="Score"):
+    """Pivot one metric of ``run_scenarios`` into dataset x hyperparameters"""
+    return table[metric].unstack("hyperparameters")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backtest a strategy on every dataset/hyperparameters pair"
+    )
+    parser.add_argument("strategy", nargs="?", default="strategy9")
+    parser.add_argument(
+        "--dir",
+        type=Path,
+        action="append",
+        help="Directory to search (repeatable, default: kaggle/input and Data)",
+    )
+    parser.add_argument("--metric", default="Score")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    scenarios = discover_scenarios(args.dir or SEARCH_DIRS)
+    if not scenarios:
+        parser.error("No dataset/hyperparameters pairs found")
+
+    table = run_scenarios(args.strategy, scenarios, args.workers)
+    print(table.to_string())
+    print()
+    print(metric_matrix(table, args.metric).to_string())
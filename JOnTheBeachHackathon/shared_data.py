@@ -0,0 +1,108 @@
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+
+
+# Columns that are stored as integer codes into a label table
+CODED_COLUMNS = ["timestamp", "symbol"]
+
+
+class SharedMarketData:
+    """Market data packed once into shared memory for worker processes.
+
+    Numeric columns are copied into a single float64 block and the
+    ``timestamp``/``symbol`` columns into int32 codes, so workers attach to
+    the same pages instead of each receiving a pickled DataFrame. The
+    picklable ``spec`` is all a worker needs to call ``attach_market_data``.
+    Other object columns (e.g. the row ``id``) are not shared.
+    """
+
+    def __init__(self, combined_data):
+        if not combined_data["timestamp"].is_monotonic_increasing:
+            combined_data = combined_data.sort_values("timestamp", kind="stable")
+
+        numeric = [
+            column
+            for column in combined_data.columns
+            if column not in CODED_COLUMNS
+            and pd.api.types.is_numeric_dtype(combined_data[column])
+        ]
+        n_rows = len(combined_data)
+
+        # Blocks created so far, released if packing the data fails
+        self._blocks = []
+        try:
+            self._values = self._create(max(1, n_rows * len(numeric) * 8))
+            self._codes = self._create(max(1, n_rows * len(CODED_COLUMNS) * 4))
+
+            values = np.ndarray(
+                (len(numeric), n_rows), dtype=np.float64, buffer=self._values.buf
+            )
+            for i, column in enumerate(numeric):
+                values[i] = combined_data[column].to_numpy(dtype=np.float64)
+
+            codes = np.ndarray(
+                (len(CODED_COLUMNS), n_rows), dtype=np.int32, buffer=self._codes.buf
+            )
+            labels = {}
+            for i, column in enumerate(CODED_COLUMNS):
+                codes[i], labels[column] = pd.factorize(combined_data[column])
+        except BaseException:
+            # A block cannot be closed while arrays still view it
+            values = codes = None
+            self.close()
+            raise
+
+        self.spec = {
+            "values": self._values.name,
+            "codes": self._codes.name,
+            "n_rows": n_rows,
+            "numeric": numeric,
+            "labels": {column: np.asarray(label) for column, label in labels.items()},
+            "columns": [
+                c for c in combined_data.columns if c in numeric or c in CODED_COLUMNS
+            ],
+        }
+
+    def _create(self, size):
+        block = SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        return block
+
+    def close(self):
+        """Release and remove the shared blocks (owner side)"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_market_data(spec):
+    """Rebuild the market DataFrame from a ``SharedMarketData.spec``.
+
+    Returns ``(combined_data, blocks)``; the numeric columns are views into
+    the shared blocks, which must be kept alive as long as the frame is used.
+    """
+    values_block = SharedMemory(name=spec["values"])
+    codes_block = SharedMemory(name=spec["codes"])
+    n_rows = spec["n_rows"]
+
+    values = np.ndarray(
+        (len(spec["numeric"]), n_rows), dtype=np.float64, buffer=values_block.buf
+    )
+    codes = np.ndarray(
+        (len(CODED_COLUMNS), n_rows), dtype=np.int32, buffer=codes_block.buf
+    )
+
+    data = {column: values[i] for i, column in enumerate(spec["numeric"])}
+    for i, column in enumerate(CODED_COLUMNS):
+        data[column] = spec["labels"][column][codes[i]]
+
+    combined_data = pd.DataFrame(data, copy=False)[spec["columns"]]
+    return combined_data, (values_block, codes_block)
@@ -1,4 +1,4 @@
-import numpy as np
+from indicators import SMA, RollingStd
 
 
 MOVING_AVERAGE_WINDOW = 20
@@ -9,16 +9,17 @@ class DefaultStrategy:
     def __init__(self):
         self.initialized = False
 
-        # Price history for each pair - this maintains state between calls
-        self.price_history = {
-            "token_1/fiat": [],
-            "token_2/fiat": [],
-            "token_1/token_2": [],
-        }
-
         # Window size for moving averages
         self.window = MOVING_AVERAGE_WINDOW
 
+        # Rolling mean and deviation for each pair - this maintains state between calls
+        self.mean = {
+            "token_1/fiat": SMA(self.window),
+            "token_2/fiat": SMA(self.window),
+            "token_1/token_2": SMA(self.window),
+        }
+        self.std = {pair: RollingStd(self.window) for pair in self.mean}
+
         # Volatility threshold for signals
         self.threshold = VOLATILITY_THRESHOLD
 
@@ -34,17 +35,15 @@ class DefaultStrategy:
         """
         orders = []
 
-        # Update price history for each pair
+        # Update rolling statistics for each pair
         for pair, data in market_data.items():
-            if pair in self.price_history:
-                self.price_history[pair].append(data["close"])
-                # Limit history length
-                if len(self.price_history[pair]) > self.window:
-                    self.price_history[pair] = self.price_history[pair][-self.window :]
+            if pair in self.mean:
+                self.mean[pair].update(data["close"])
+                self.std[pair].update(data["close"])
 
         # Wait until we have enough data points
-        for prices in self.price_history.values():
-            if len(prices) < self.window:
+        for mean in self.mean.values():
+            if len(mean) < self.window:
                 return orders
 
         # Initialize flag for trading
@@ -54,9 +53,8 @@ class DefaultStrategy:
 
         # Check for trading opportunities in token_1/fiat
         if "token_1/fiat" in market_data:
-            prices = self.price_history["token_1/fiat"]
-            price = prices[-1]
-            mu, sigma = np.mean(prices), np.std(prices)
+            price = market_data["token_1/fiat"]["close"]
+            mu, sigma = self.mean["token_1/fiat"].value, self.std["token_1/fiat"].value
 
             if price < mu - self.threshold * sigma:
                 # Buy token_1 with fiat if we have enough fiat
@@ -77,9 +75,8 @@ class DefaultStrategy:
 
         # Check for trading opportunities in token_2/fiat
         if "token_2/fiat" in market_data:
-            prices = self.price_history["token_2/fiat"]
-            price = prices[-1]
-            mu, sigma = np.mean(prices), np.std(prices)
+            price = market_data["token_2/fiat"]["close"]
+            mu, sigma = self.mean["token_2/fiat"].value, self.std["token_2/fiat"].value
 
             if price < mu - self.threshold * sigma:
                 # Buy token_2 with fiat if we have enough fiat
@@ -1,4 +1,4 @@
-import numpy as np
+from indicators import SMA, RollingStd, RSI, ADL
 
 
 # Set risk control parameters
@@ -6,49 +6,6 @@ max_percentage_per_transaction = 0.002
 min_qty = 0.02
 
 
-# Define the technical indicators
-def calculate_ema(prices, window):
-    return np.mean(prices[-window:])
-
-
-def calculate_rsi(prices, window):
-    gains = [max(0, prices[i] - prices[i - 1]) for i in range(1, len(prices))]
-    losses = [max(0, prices[i - 1] - prices[i]) for i in range(1, len(prices))]
-    avg_gain = np.mean(gains[-window:])
-    avg_loss = np.mean(losses[-window:])
-
-    # Check for division by zero
-    if avg_loss == 0:
-        return 100  # RSI is 100 when there are no losses
-
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-
-def calculate_adl(prices, volumes, window):
-    adl = []
-    for i in range(1, len(prices)):
-        if prices[i] > prices[i - 1]:
-            adl.append(volumes[i] * (prices[i] - prices[i - 1]) / prices[i - 1])
-        elif prices[i] < prices[i - 1]:
-            adl.append(-volumes[i] * (prices[i - 1] - prices[i]) / prices[i - 1])
-        else:
-            adl.append(0)
-    return np.sum(adl[-window:])
-
-
-def calculate_obv(prices, volumes, window):
-    obv = []
-    for i in range(1, len(prices)):
-        if prices[i] > prices[i - 1]:
-            obv.append(volumes[i])
-        elif prices[i] < prices[i - 1]:
-            obv.append(-volumes[i])
-        else:
-            obv.append(0)
-    return np.sum(obv[-window:])
-
-
 # Define the strategy parameters
 BUY_THRESHOLD = 20
 SELL_THRESHOLD = 80
@@ -63,48 +20,45 @@ class DefaultStrategy:
     def __init__(self):
         self.initialized = False
 
-        # Price and volume history for each pair - this maintains state between calls
-        self.history = {
-            "token_1/fiat": {"prices": [], "volumes": []},
-            "token_2/fiat": {"prices": [], "volumes": []},
-            "token_1/token_2": {"prices": [], "volumes": []},
-        }
-
         # Window size for moving averages
         self.window = EMA_WINDOW
 
+        # Streaming indicators for each pair - this maintains state between calls
+        self.indicators = {
+            pair: {
+                "sma": SMA(EMA_WINDOW),
+                "std": RollingStd(EMA_WINDOW),
+                "rsi": RSI(RSI_WINDOW),
+                "adl": ADL(ADL_WINDOW),
+            }
+            for pair in ["token_1/fiat", "token_2/fiat", "token_1/token_2"]
+        }
+
     def on_data(self, market_data, balances):
 
         orders = []
 
-        # Update price history for each pair
+        # Update indicators for each pair
         for pair, data in market_data.items():
-            if pair in self.history:
-                self.history[pair]["prices"].append(data["close"])
-                self.history[pair]["volumes"].append(data["volume"])
-                # Limit history length
-                if len(self.history[pair]["prices"]) > self.window:
-                    self.history[pair]["prices"] = self.history[pair]["prices"][
-                        -self.window :
-                    ]
-                    self.history[pair]["volumes"] = self.history[pair]["volumes"][
-                        -self.window :
-                    ]
+            if pair in self.indicators:
+                indicators = self.indicators[pair]
+                indicators["sma"].update(data["close"])
+                indicators["std"].update(data["close"])
+                indicators["rsi"].update(data["close"])
+                indicators["adl"].update(data["close"], data["volume"])
 
         # Wait until we have enough data points
-        for pair in self.history.values():
-            if len(pair["prices"]) < self.window:
+        for indicators in self.indicators.values():
+            if len(indicators["sma"]) < self.window:
                 return orders
 
-        def strategy(pair, prices, volumes, balances):
-            price = prices[-1]
-            volume = volumes[-1]
-            sma = calculate_ema(prices, EMA_WINDOW)
-            std = np.std(prices[-EMA_WINDOW:])
+        def strategy(pair, price, indicators, balances):
+            sma = indicators["sma"].value
+            std = indicators["std"].value
             upper_band = sma + STD_DEV * std
             lower_band = sma - STD_DEV * std
-            rsi = calculate_rsi(prices, RSI_WINDOW)
-            adl = calculate_adl(prices, volumes, ADL_WINDOW)
+            rsi = indicators["rsi"].value
+            adl = indicators["adl"].value
 
             if price < lower_band and rsi < BUY_THRESHOLD and adl > 0:
                 # Buy with fiat if we have enough fiat
@@ -169,9 +123,8 @@ class DefaultStrategy:
         # Check for trading opportunities in each pair
         for pair in ["token_1/fiat", "token_2/fiat"]:
             if pair in market_data:
-                prices = self.history[pair]["prices"]
-                volumes = self.history[pair]["volumes"]
-                order = strategy(pair, prices, volumes, balances)
+                price = market_data[pair]["close"]
+                order = strategy(pair, price, self.indicators[pair], balances)
                 if order:
                     orders.append(order)
 
@@ -1,4 +1,5 @@
 import numpy as np
+from indicators import PriceHistory
 
 
 # Define the technical indicators
@@ -7,8 +8,9 @@ def calculate_ema(prices, window):
 
 
 def calculate_rsi(prices, window):
-    gains = [max(0, prices[i] - prices[i - 1]) for i in range(1, len(prices))]
-    losses = [max(0, prices[i - 1] - prices[i]) for i in range(1, len(prices))]
+    changes = np.diff(prices)
+    gains = np.maximum(changes, 0)
+    losses = np.maximum(-changes, 0)
     avg_gain = np.mean(gains[-window:])
     avg_loss = np.mean(losses[-window:])
     rs = avg_gain / avg_loss
@@ -25,16 +27,16 @@ class DefaultStrategy:
     def __init__(self):
         self.initialized = False
 
-        # Price history for each pair - this maintains state between calls
-        self.price_history = {
-            "token_1/fiat": [],
-            "token_2/fiat": [],
-            "token_1/token_2": [],
-        }
-
         # Window size for moving averages
         self.window = 20
 
+        # Close price history of the last window for each pair - this
+        # maintains state between calls
+        self.price_history = {
+            pair: PriceHistory(self.window, fields=["close"])
+            for pair in ["token_1/fiat", "token_2/fiat", "token_1/token_2"]
+        }
+
         # Volatility threshold for signals
         self.threshold = 2.1
 
@@ -48,10 +50,7 @@ class DefaultStrategy:
         # Update price history for each pair
         for pair, data in market_data.items():
             if pair in self.price_history:
-                self.price_history[pair].append(data["close"])
-                # Limit history length
-                if len(self.price_history[pair]) > self.window:
-                    self.price_history[pair] = self.price_history[pair][-self.window :]
+                self.price_history[pair].update(data)
 
         # Wait until we have enough data points
         for prices in self.price_history.values():
@@ -65,7 +64,7 @@ class DefaultStrategy:
 
         # Check for trading opportunities in token_1/fiat
         if "token_1/fiat" in market_data:
-            prices = self.price_history["token_1/fiat"]
+            prices = self.price_history["token_1/fiat"]["close"]
             price = prices[-1]
             ema = calculate_ema(prices, self.ema_window)
             rsi = calculate_rsi(prices, self.rsi_window)
@@ -90,7 +89,7 @@ class DefaultStrategy:
 
         # Check for trading opportunities in token_2/fiat
         if "token_2/fiat" in market_data:
-            prices = self.price_history["token_2/fiat"]
+            prices = self.price_history["token_2/fiat"]["close"]
             price = prices[-1]
             ema = calculate_ema(prices, self.ema_window)
             rsi = calculate_rsi(prices, self.rsi_window)
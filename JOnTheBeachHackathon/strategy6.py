@@ -1,4 +1,5 @@
 import numpy as np
+from indicators import PriceHistory
 
 
 # Set risk control parameters
@@ -26,8 +27,9 @@ def calculate_ema(prices, window):
 
 
 def calculate_rsi(prices, window):
-    gains = [max(0, prices[i] - prices[i - 1]) for i in range(1, len(prices))]
-    losses = [max(0, prices[i - 1] - prices[i]) for i in range(1, len(prices))]
+    changes = np.diff(prices)
+    gains = np.maximum(changes, 0)
+    losses = np.maximum(-changes, 0)
     avg_gain = np.mean(gains[-window:])
     avg_loss = np.mean(losses[-window:])
 
@@ -56,16 +58,16 @@ class DefaultStrategy:
     def __init__(self):
         self.initialized = False
 
-        # Price history for each pair - this maintains state between calls
-        self.price_history = {
-            "token_1/fiat": [],
-            "token_2/fiat": [],
-            "token_1/token_2": [],
-        }
-
         # Window size for moving averages
         self.window = ema_window
 
+        # Close price history of the last window for each pair - this
+        # maintains state between calls
+        self.price_history = {
+            pair: PriceHistory(self.window, fields=["close"])
+            for pair in ["token_1/fiat", "token_2/fiat", "token_1/token_2"]
+        }
+
     def on_data(self, market_data, balances):
 
         orders = []
@@ -73,10 +75,7 @@ class DefaultStrategy:
         # Update price history for each pair
         for pair, data in market_data.items():
             if pair in self.price_history:
-                self.price_history[pair].append(data["close"])
-                # Limit history length
-                if len(self.price_history[pair]) > self.window:
-                    self.price_history[pair] = self.price_history[pair][-self.window :]
+                self.price_history[pair].update(data)
 
         # Wait until we have enough data points
         for prices in self.price_history.values():
@@ -160,7 +159,7 @@ class DefaultStrategy:
         # Check for trading opportunities in each pair
         for pair in ["token_1/fiat", "token_2/fiat"]:
             if pair in market_data:
-                prices = self.price_history[pair]
+                prices = self.price_history[pair]["close"]
                 order = strategy(pair, prices, balances)
                 if order:
                     orders.append(order)
@@ -0,0 +1,242 @@
+import argparse
+import importlib
+import itertools
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import pandas as pd
+
+from backtest import load_hyperparameters, run_backtest
+from data_cache import load_market_data
+from journal import OrderJournal
+from metrics import calculate_metrics
+from trader import EquityCurve
+from shared_data import SharedMarketData, attach_market_data
+
+
+# Example search space for strategy9, used when sweep.py is run directly
+STRATEGY9_GRID = {
+    "BUY_THRESHOLD": [15, 20, 25, 30],
+    "SELL_THRESHOLD": [70, 75, 80, 85],
+    "EMA_WINDOW": [14, 21, 28],
+    "STD_DEV": [1.0, 1.5, 2.0],
+    "max_percentage_per_transaction": [0.001, 0.002, 0.004],
+}
+
+# Market data attached by each worker process, see _init_worker
+_worker_data = None
+_worker_blocks = None
+
+
+def grid_configs(grid):
+    """Yield every combination of a {param: [values]} grid"""
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def random_configs(space, n_iter, seed=None):
+    """Yield ``n_iter`` random samples from a {param: values} search space.
+
+    A list is sampled uniformly; a ``(low, high)`` tuple is sampled as an
+    integer if both bounds are ints, otherwise as a float.
+    """
+    rng = random.Random(seed)
+    for _ in range(n_iter):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = rng.randint(low, high)
+                else:
+                    config[name] = rng.uniform(low, high)
+            else:
+                config[name] = rng.choice(values)
+        yield config
+
+
+@contextmanager
+def configured_strategy(strategy_cls, params):
+    """Instantiate ``strategy_cls`` with ``params`` applied.
+
+    The strategies read their parameters from module-level constants, so a
+    param naming one of them is set on the module for the duration of the
+    block (and restored afterwards); any other param is set on the instance.
+    """
+    module = sys.modules[strategy_cls.__module__]
+    module_params = {k: v for k, v in params.items() if hasattr(module, k)}
+    previous = {k: getattr(module, k) for k in module_params}
+    for name, value in module_params.items():
+        setattr(module, name, value)
+    try:
+        strategy = strategy_cls()
+        for name, value in params.items():
+            if name not in module_params:
+                setattr(strategy, name, value)
+        yield strategy
+    finally:
+        for name, value in previous.items():
+            setattr(module, name, value)
+
+
+def evaluate(
+    strategy_cls,
+    params,
+    combined_data,
+    fee,
+    balances,
+    engine="numpy",
+    keep_orders=False,
+    profiler=None,
+):
+    """Backtest one parameter set and return its metrics.
+
+    With ``keep_orders`` the OrderJournal is returned too, as
+    ``(metrics, journal)``. ``profiler`` is passed on to ``run_backtest``.
+    """
+    journal = OrderJournal()
+    equity_curve = EquityCurve()
+    with configured_strategy(strategy_cls, params) as strategy:
+        run_backtest(
+            combined_data,
+            fee,
+            dict(balances),
+            strategy=strategy,
+            engine=engine,
+            journal=journal,
+            equity_curve=equity_curve,
+            profiler=profiler,
+        )
+    metrics = calculate_metrics(journal, combined_data, fee, balances, equity_curve)
+    return (metrics, journal) if keep_orders else metrics
+
+
+def _init_worker(spec):
+    global _worker_data, _worker_blocks
+    _worker_data, _worker_blocks = attach_market_data(spec)
+
+
+def _evaluate_in_worker(strategy_cls, params, rows, fee, balances, engine, keep_orders):
+    combined_data = _worker_data if rows is None else _worker_data.iloc[slice(*rows)]
+    return evaluate(
+        strategy_cls, params, combined_data, fee, balances, engine, keep_orders
+    )
+
+
+def run_parallel(
+    jobs, combined_data, fee, balances, max_workers=None, engine="numpy", keep_orders=False
+):
+    """Backtest ``{key: (strategy_cls, params)}`` jobs across a process pool.
+
+    The market data is shared with the workers once through shared memory.
+    A job may also be ``(strategy_cls, params, (start, stop))`` to backtest
+    only those rows of ``combined_data``. Yields ``(key, result)`` as jobs
+    complete, where ``result`` is what ``evaluate`` returns.
+    """
+    with SharedMarketData(combined_data) as shared:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(shared.spec,),
+        ) as executor:
+            futures = {}
+            for key, (strategy_cls, params, *rows) in jobs.items():
+                future = executor.submit(
+                    _evaluate_in_worker,
+                    strategy_cls,
+                    params,
+                    rows[0] if rows else None,
+                    fee,
+                    balances,
+                    engine,
+                    keep_orders,
+                )
+                futures[future] = key
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+
+def flatten_metrics(metrics):
+    """Flatten the nested "Final Balance" entry of ``calculate_metrics``"""
+    flat = {k: v for k, v in metrics.items() if k != "Final Balance"}
+    for currency, amount in metrics.get("Final Balance", {}).items():
+        flat[f"Final {currency}"] = amount
+    return flat
+
+
+def run_sweep(
+    strategy_cls,
+    configs,
+    combined_data,
+    fee,
+    balances,
+    max_workers=None,
+    engine="numpy",
+    rank_by="Score",
+):
+    """Backtest every config in ``configs`` across a process pool.
+
+    Args:
+        strategy_cls: Strategy class, e.g. ``strategy9.DefaultStrategy``
+        configs: Iterable of {param: value} dicts, see ``grid_configs`` and
+            ``random_configs``
+        combined_data: DataFrame containing market data for multiple pairs
+        fee: Trading fee as a fraction
+        balances: Dictionary of {currency: amount} containing initial balances
+        max_workers: Number of worker processes (defaults to the CPU count)
+        engine: ``run_backtest`` tick replay engine
+        rank_by: Metric the result table is sorted on, best first
+
+    Returns:
+        DataFrame with one row per config: its params followed by its metrics
+    """
+    configs = list(configs)
+    jobs = {i: (strategy_cls, params) for i, params in enumerate(configs)}
+    rows = [
+        {**configs[i], **flatten_metrics(metrics)}
+        for i, metrics in run_parallel(
+            jobs, combined_data, fee, balances, max_workers, engine
+        )
+    ]
+
+    table = pd.DataFrame(rows)
+    if rows:
+        table = table.sort_values(rank_by, ascending=False, ignore_index=True)
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep for strategy9")
+    parser.add_argument("--data", default="kaggle/input/config/test.csv")
+    parser.add_argument(
+        "--hyperparameters", default="kaggle/input/config/hyperparameters.json"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--random", type=int, default=0, help="Random configs to sample instead of the full grid"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    strategy_module = importlib.import_module("strategy9")
+    fee, balances = load_hyperparameters(args.hyperparameters)
+    combined_data = load_market_data(args.data)
+
+    if args.random:
+        configs = random_configs(STRATEGY9_GRID, args.random, args.seed)
+    else:
+        configs = grid_configs(STRATEGY9_GRID)
+
+    table = run_sweep(
+        strategy_module.DefaultStrategy,
+        configs,
+        combined_data,
+        fee,
+        balances,
+        max_workers=args.workers,
+    )
+    print(table.head(args.top).to_string())
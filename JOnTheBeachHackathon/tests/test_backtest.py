@@ -0,0 +1,144 @@
+import importlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import strategy9
+from backtest import load_hyperparameters, run_backtest, run_backtest_streaming
+from journal import OrderJournal, seeded_ids
+from live_sim import ReplayClock, simulate_live
+from metrics import calculate_metrics
+from trader import EquityCurve
+
+DATA = Path(__file__).parents[1] / "kaggle" / "input" / "config" / "test.csv"
+FEE, BALANCES = load_hyperparameters(DATA.with_name("hyperparameters.json"))
+ORDER_COLUMNS = ["timestamp", "pair", "side", "qty"]
+
+# Metrics of the orders of the original row-by-row backtest on test.csv
+BASELINE = {
+    "strategy": {
+        "PnL": 20692943.5464,
+        "Turnover": 1210599.6739,
+        "Trade Count": 254,
+        "Final Balance": {"fiat": 574434.9356, "token_1": 199.86, "token_2": 9.2},
+        "Score": 6.1548,
+    },
+    "strategy3": {
+        "PnL": 31295418.7634,
+        "Turnover": 3828344.7733,
+        "Trade Count": 620,
+        "Final Balance": {"fiat": 726439.2531, "token_1": 311.3522, "token_2": 5.458},
+        "Score": 5.7592,
+    },
+    "strategy4": {
+        "PnL": 20902370.4924,
+        "Turnover": 131049.635,
+        "Trade Count": 32,
+        "Final Balance": {"fiat": 478368.6437, "token_1": 201.4166, "token_2": 10.1941},
+        "Score": 2.5336,
+    },
+    "strategy9": {
+        "PnL": 888006.0771,
+        "Turnover": 11073.7019,
+        "Trade Count": 7,
+        "Final Balance": {"fiat": 503389.5237, "token_1": 199.2008, "token_2": 9.98},
+        "Score": -4.632,
+    },
+}
+
+
+@pytest.fixture(scope="module")
+def market():
+    return pd.read_csv(DATA)
+
+
+def backtest(market, name, **options):
+    # Strategies keep state between ticks, so each run gets a fresh one
+    strategy = importlib.import_module(name).DefaultStrategy()
+    return run_backtest(
+        market.copy(),
+        FEE,
+        dict(BALANCES),
+        strategy,
+        id_generator=seeded_ids(0),
+        **options,
+    )
+
+
+@pytest.mark.parametrize("name", ["strategy", "strategy3"])
+def test_engines_replay_the_same_orders(market, name):
+    expected = backtest(market, name, engine="pandas")
+    assert len(expected) > 0
+    for options in ({}, {"trader_type": "compact"}):
+        orders = backtest(market, name, engine="numpy", **options)
+        pd.testing.assert_frame_equal(orders, expected)
+    streamed = run_backtest_streaming(
+        DATA,
+        FEE,
+        dict(BALANCES),
+        importlib.import_module(name).DefaultStrategy(),
+        chunksize=500,
+        id_generator=seeded_ids(0),
+    )
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+@pytest.mark.parametrize("name", list(BASELINE))
+def test_metrics_match_the_original_backtest(market, name):
+    journal = OrderJournal()
+    backtest(market, name, engine="numpy", journal=journal)
+    metrics = calculate_metrics(journal, market, FEE, BALANCES)
+    assert {key: metrics[key] for key in BASELINE[name]} == BASELINE[name]
+
+
+def test_vectorized_engine_matches_the_tick_engine(market):
+    expected_balances, balances = dict(BALANCES), dict(BALANCES)
+    expected = run_backtest(
+        market.copy(),
+        FEE,
+        expected_balances,
+        strategy9.DefaultStrategy(),
+        "numpy",
+        id_generator=seeded_ids(0),
+    )
+    orders = run_backtest(
+        market.copy(),
+        FEE,
+        balances,
+        strategy9.DefaultStrategy(),
+        "vectorized",
+        id_generator=seeded_ids(0),
+    )
+    pd.testing.assert_frame_equal(orders, expected, check_dtype=False)
+    assert balances == pytest.approx(expected_balances)
+
+def test_live_replay_matches_the_backtest(market):
+    expected = backtest(market, "strategy4", engine="numpy")
+    orders, stats = simulate_live(
+        market.copy(),
+        FEE,
+        dict(BALANCES),
+        importlib.import_module("strategy4").DefaultStrategy(),
+        ReplayClock(speed=None),
+    )
+    ticks = market["timestamp"].nunique()
+    assert stats["published"] == stats["processed"] == ticks
+    assert stats["missed"] == 0
+    pd.testing.assert_frame_equal(orders[ORDER_COLUMNS], expected[ORDER_COLUMNS])
+
+def test_equity_curve_is_marked_to_market(market):
+    equity_curve = EquityCurve(capacity=16)
+    backtest(market, "strategy3", engine="numpy", equity_curve=equity_curve)
+
+    closes = market.pivot(index="timestamp", columns="symbol", values="close")
+    # The initial value, then one sample per timestamp
+    assert len(equity_curve) == len(closes) + 1
+    first = closes.iloc[0]
+    assert equity_curve.values[0] == pytest.approx(
+        BALANCES["fiat"]
+        + BALANCES["token_1"] * first["token_1/fiat"]
+        + BALANCES["token_2"] * first["token_2/fiat"]
+    )
+    assert np.isfinite(equity_curve.values).all()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from data_cache import load_market_data, source_digest
+
+
+def test_cache_matches_the_csv_and_follows_changes(tmp_path):
+    rng = np.random.default_rng(5)
+    csv = tmp_path / "market.csv"
+    market = pd.DataFrame(
+        {
+            "id": [f"row{i}" for i in range(6)],
+            # Out of order, the cache sorts by timestamp
+            "timestamp": ["2025-05-01 00:01:00"] * 3 + ["2025-05-01 00:00:00"] * 3,
+            "open": rng.uniform(size=6),
+            "high": rng.uniform(size=6),
+            "low": rng.uniform(size=6),
+            "close": rng.uniform(size=6),
+            "volume": rng.uniform(size=6),
+            "symbol": ["token_1/fiat", "token_2/fiat", "token_1/token_2"] * 2,
+        }
+    )
+    market.to_csv(csv, index=False)
+    cache_dir = tmp_path / "cache"
+
+    loaded = load_market_data(csv, cache_dir)
+    expected = market.drop(columns="id").sort_values("timestamp", kind="stable")
+    expected["timestamp"] = pd.to_datetime(expected["timestamp"])
+    pd.testing.assert_frame_equal(
+        loaded.astype({"symbol": str}),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+    )
+
+    # A modified source gets a new digest and a new cache entry
+    digest = source_digest(csv, cache_dir)
+    market.loc[0, "close"] = 42.0
+    market.to_csv(csv, index=False)
+    assert source_digest(csv, cache_dir) != digest
+    assert 42.0 in load_market_data(csv, cache_dir)["close"].to_numpy()
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+import strategy4
+import strategy5
+from indicators import (
+    ADL,
+    ATR,
+    CCI,
+    OBV,
+    RSI,
+    SMA,
+    VWAP,
+    PriceHistory,
+    RollingStd,
+    RollingSum,
+    Stochastic,
+)
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(7)
+    # Some flat ticks, for the ties of RSI, OBV and ADL
+    changes = np.where(rng.random(500) < 0.05, 0.0, rng.normal(0, 1, 500))
+    close = 100 + np.cumsum(changes)
+    high = close + rng.uniform(0, 2, 500)
+    low = close - rng.uniform(0, 2, 500)
+    volume = rng.uniform(1, 10, 500)
+    return close, high, low, volume
+
+
+# The list-slicing functions the strategies used before indicators.py
+def reference_obv(prices, volumes, window):
+    obv = []
+    for i in range(1, len(prices)):
+        if prices[i] > prices[i - 1]:
+            obv.append(volumes[i])
+        elif prices[i] < prices[i - 1]:
+            obv.append(-volumes[i])
+        else:
+            obv.append(0)
+    return np.sum(obv[-window:])
+
+
+def reference_adl(prices, volumes, window):
+    adl = []
+    for i in range(1, len(prices)):
+        if prices[i] > prices[i - 1]:
+            adl.append(volumes[i] * (prices[i] - prices[i - 1]) / prices[i - 1])
+        elif prices[i] < prices[i - 1]:
+            adl.append(-volumes[i] * (prices[i - 1] - prices[i]) / prices[i - 1])
+        else:
+            adl.append(0)
+    return np.sum(adl[-window:])
+
+
+def test_close_indicators_match_the_strategy_functions(bars):
+    close, _, _, volume = bars
+    sma, std, rsi = SMA(21), RollingStd(21), RSI(14)
+    obv, adl, vwap, stochastic = OBV(8), ADL(8), VWAP(10), Stochastic(14)
+    for t in range(len(close)):
+        prices, volumes = close[: t + 1], volume[: t + 1]
+        sma.update(close[t])
+        std.update(close[t])
+        rsi.update(close[t])
+        obv.update(close[t], volume[t])
+        adl.update(close[t], volume[t])
+        vwap.update(close[t], volume[t])
+        stochastic.update(close[t])
+
+        assert sma.value == pytest.approx(strategy4.calculate_ema(prices, 21))
+        assert std.value == pytest.approx(np.std(prices[-21:]), abs=1e-9)
+        assert obv.value == pytest.approx(reference_obv(prices, volumes, 8))
+        assert adl.value == pytest.approx(reference_adl(prices, volumes, 8))
+        if t >= 1:
+            assert rsi.value == pytest.approx(strategy4.calculate_rsi(prices, 14))
+        if t >= 10:
+            expected = strategy4.calculate_vwap(prices, volumes, 10)
+            assert vwap.value == pytest.approx(expected)
+        if t >= 14:
+            expected = strategy4.calculate_stochastic_oscillator(prices, 14)
+            assert stochastic.value == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("window", [2, 14, 30])
+def test_atr_and_cci_match_the_strategy_functions(bars, window):
+    close, high, low, _ = bars
+    prices = [{"high": h, "low": l, "close": c} for h, l, c in zip(high, low, close)]
+    atr, cci = ATR(window - 1), CCI(window)
+    for t in range(len(close)):
+        atr.update(high[t], low[t], close[t])
+        cci.update(high[t], low[t], close[t])
+        if t >= 1:
+            for module in (strategy4, strategy5):
+                expected = module.calculate_atr(prices[: t + 1], window)
+                assert atr.value == pytest.approx(expected)
+        if t >= window:
+            ohlc = {"High": high[: t + 1], "Low": low[: t + 1], "Close": close[: t + 1]}
+            expected = strategy4.calculate_commodity_channel_index(ohlc, window)
+            assert cci.value == pytest.approx(expected)
+
+
+def test_rolling_sum_stays_exact_over_long_runs():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1e6, 1e3, 20_000)
+    rolling = RollingSum(50)
+    for x in values:
+        rolling.update(x)
+    assert rolling.value == pytest.approx(values[-50:].sum(), rel=1e-14)
+
+
+def test_price_history_windows_are_time_ordered():
+    history = PriceHistory(4, fields=["close", "volume"])
+    for i in range(10):
+        history.update({"close": float(i), "volume": 10.0 * i})
+    np.testing.assert_array_equal(history["close"], [6, 7, 8, 9])
+    np.testing.assert_array_equal(history.window("volume", 2), [80, 90])
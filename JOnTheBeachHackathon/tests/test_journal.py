@@ -0,0 +1,47 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from journal import OrderJournal, random_ids, seeded_ids
+
+
+def test_append_and_extend_grow_the_columns():
+    journal = OrderJournal(capacity=2)
+    for i in range(3):
+        journal.append("2025-05-01 00:00:00", "token_1/fiat", "buy", float(i))
+    journal.extend(
+        ["2025-05-01 00:01:00"] * 5, ["token_2/fiat"] * 5, ["sell"] * 5, np.arange(5.0)
+    )
+    assert len(journal) == 8
+    assert journal.capacity >= 8
+
+    frame = journal.to_frame()
+    assert list(frame.columns) == ["id", "timestamp", "pair", "side", "qty"]
+    assert frame["qty"].tolist() == [0, 1, 2, 0, 1, 2, 3, 4]
+    assert frame["pair"].tolist() == ["token_1/fiat"] * 3 + ["token_2/fiat"] * 5
+    assert all(uuid.UUID(i).version == 4 for i in frame["id"])
+
+
+def test_datetime_timestamps_are_stored_natively():
+    journal = OrderJournal()
+    journal.append(pd.Timestamp("2025-05-01"), "token_1/fiat", "buy", 1.0)
+    assert journal.columns()["timestamp"].dtype == "datetime64[ns]"
+
+
+def test_ids_are_uuid4_and_seeded_ids_are_reproducible():
+    ids = random_ids(100)
+    assert len(set(ids)) == 100
+    assert all(uuid.UUID(i).version == 4 for i in ids)
+    assert seeded_ids(1)(3) == seeded_ids(1)(3)
+    assert seeded_ids(1)(3) != seeded_ids(2)(3)
+
+
+def test_digest_ignores_the_ids():
+    def journal(qty):
+        journal = OrderJournal()
+        journal.append("2025-05-01 00:00:00", "token_1/fiat", "buy", qty)
+        return journal
+
+    assert journal(1.0).digest() == journal(1.0).digest()
+    assert journal(1.0).digest() != journal(2.0).digest()
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journal import OrderJournal
+from metrics import calculate_metrics
+
+BALANCES = {"fiat": 10_000.0, "token_1": 5.0, "token_2": 20.0}
+FEE = 0.0003
+
+
+def reference_metrics(backtest_result, market_data, fee, initial_balance):
+    """The original trade-by-trade loop of calculate_metrics"""
+    market_data = market_data.rename(columns={"symbol": "pair"})
+    merged_data = pd.merge(
+        backtest_result,
+        market_data[["timestamp", "pair", "close"]],
+        on=["timestamp", "pair"],
+    )
+    fiat_balance = initial_balance["fiat"]
+    token1_balance = initial_balance["token_1"]
+    token2_balance = initial_balance["token_2"]
+    pnl = turnover = trade_count = fees_paid = 0
+    daily_returns = []
+    for _, row in merged_data.iterrows():
+        pair, side, qty, price = row["pair"], row["side"], row["qty"], row["close"]
+        if side == "buy":
+            if pair == "token_1/fiat":
+                fiat_balance -= qty * price * (1 + fee)
+                token1_balance += qty
+            elif pair == "token_2/fiat":
+                fiat_balance -= qty * price * (1 + fee)
+                token2_balance += qty
+        elif side == "sell":
+            if pair == "token_1/fiat":
+                fiat_balance += qty * price * (1 - fee)
+                token1_balance -= qty
+            elif pair == "token_2/fiat":
+                fiat_balance += qty * price * (1 - fee)
+                token2_balance -= qty
+        turnover += qty * price
+        trade_count += 1
+        fees_paid += qty * price * fee
+        pnl = fiat_balance + token1_balance * price + token2_balance * price
+        daily_returns.append(pnl)
+
+    returns = pd.Series(daily_returns).pct_change()
+    sharpe_ratio = returns.mean() / returns.std() * (252**0.5)
+    cumulative_returns = (1 + returns).cumprod()
+    max_drawdown = (cumulative_returns / cumulative_returns.expanding().max() - 1).min()
+    return {
+        "PnL": pnl,
+        "Sharpe Ratio": sharpe_ratio,
+        "Max Drawdown": max_drawdown,
+        "Turnover": turnover,
+        "Trade Count": trade_count,
+        "Fees Paid": fees_paid,
+        "Final Balance": {
+            "fiat": fiat_balance,
+            "token_1": token1_balance,
+            "token_2": token2_balance,
+        },
+    }
+
+
+@pytest.fixture
+def market():
+    rng = np.random.default_rng(3)
+    timestamps = pd.date_range("2025-05-01", periods=200, freq="min").astype(str)
+    pairs = ["token_1/fiat", "token_2/fiat", "token_1/token_2"]
+    return pd.DataFrame(
+        {
+            "timestamp": np.repeat(timestamps, 3),
+            "symbol": pairs * 200,
+            "close": np.tile([1800.0, 90.0, 20.0], 200) * rng.uniform(0.9, 1.1, 600),
+        }
+    )
+
+
+@pytest.fixture
+def orders(market):
+    rng = np.random.default_rng(4)
+    rows = np.sort(rng.choice(len(market), 80, replace=False))
+    return pd.DataFrame(
+        {
+            "id": [str(i) for i in range(80)],
+            "timestamp": market["timestamp"].to_numpy()[rows],
+            "pair": market["symbol"].to_numpy()[rows],
+            "side": rng.choice(["buy", "sell"], 80),
+            "qty": rng.uniform(0.01, 2.0, 80),
+        }
+    )
+
+
+def test_matches_the_trade_by_trade_loop(market, orders):
+    metrics = calculate_metrics(orders, market, FEE, BALANCES)
+    expected = reference_metrics(orders, market, FEE, BALANCES)
+    for key, value in expected.items():
+        if key == "Final Balance":
+            for currency, amount in value.items():
+                assert metrics[key][currency] == round(amount, 4)
+        else:
+            assert metrics[key] == round(value, 4)
+
+
+def test_journal_and_submission_give_the_same_metrics(market, orders):
+    journal = OrderJournal()
+    for order in orders.itertuples():
+        journal.append(order.timestamp, order.pair, order.side, order.qty)
+    assert calculate_metrics(journal, market, FEE, BALANCES) == calculate_metrics(
+        orders, market, FEE, BALANCES
+    )
+
+
+def test_equity_curve_drives_sharpe_and_drawdown(market, orders):
+    equity = np.array([100.0, 110.0, 99.0, 121.0])
+    metrics = calculate_metrics(orders, market, FEE, BALANCES, equity)
+    returns = pd.Series(equity).pct_change()
+    assert metrics["Sharpe Ratio"] == round(
+        returns.mean() / returns.std() * 252**0.5, 4
+    )
+    assert metrics["Max Drawdown"] == -0.1
+
+
+def test_no_orders():
+    market = pd.DataFrame(
+        {"timestamp": ["t"], "symbol": ["token_1/fiat"], "close": [1.0]}
+    )
+    orders = pd.DataFrame(columns=["id", "timestamp", "pair", "side", "qty"])
+    metrics = calculate_metrics(orders, market, FEE, BALANCES)
+    assert metrics["Trade Count"] == 0
+    assert metrics["PnL"] == 0
+    assert metrics["Final Balance"] == BALANCES
@@ -0,0 +1,32 @@
+import result_cache
+from result_cache import ResultCache, result_key
+from strategy9 import DefaultStrategy
+
+
+def test_local_modules_are_followed_transitively(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "HERE", tmp_path)
+    (tmp_path / "a.py").write_text("import b\nimport numpy\n")
+    (tmp_path / "b.py").write_text("def f():\n    from c import g\n")
+    (tmp_path / "c.py").write_text("import a\n")
+    (tmp_path / "d.py").write_text("")
+
+    found = result_cache._local_modules(tmp_path / "a.py")
+    assert sorted(path.name for path in found) == ["a.py", "b.py", "c.py"]
+
+
+def test_key_covers_the_engine():
+    args = (DefaultStrategy, {}, 0.03, {"fiat": 1.0}, "data")
+    assert result_key(*args) == result_key(*args, engine="numpy")
+    assert result_key(*args) != result_key(*args, engine="pandas")
+
+
+def test_corrupt_entries_are_misses(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put("key", ({"pnl": 1.0}, None))
+    assert cache.get("key") == ({"pnl": 1.0}, None)
+
+    path = tmp_path / "key.pkl"
+    path.write_bytes(path.read_bytes()[:5])
+    assert cache.get("key") is None
+    assert not path.exists()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,64 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_data
+from shared_data import SharedMarketData, attach_market_data
+
+
+@pytest.fixture
+def market():
+    return pd.DataFrame(
+        {
+            "timestamp": np.repeat(["2024-01-01 00:00", "2024-01-01 00:01"], 2),
+            "symbol": ["token_1/fiat", "token_2/fiat"] * 2,
+            "close": [1.0, 2.0, 1.5, 2.5],
+            "volume": [10, 20, 30, 40],
+            "id": ["a", "b", "c", "d"],
+        }
+    )
+
+
+def test_workers_see_the_same_data(market):
+    with SharedMarketData(market) as shared:
+        data, blocks = attach_market_data(shared.spec)
+        pd.testing.assert_frame_equal(
+            data, market.drop(columns="id").astype({"volume": np.float64})
+        )
+        del data
+        for block in blocks:
+            block.close()
+
+
+def test_blocks_are_released_when_packing_fails(market, monkeypatch):
+    created = []
+
+    def create(size, create=True):
+        if created:
+            raise OSError("No space left on device")
+        created.append(SharedMemory(create=create, size=size))
+        return created[-1]
+
+    monkeypatch.setattr(shared_data, "SharedMemory", create)
+    with pytest.raises(OSError):
+        SharedMarketData(market)
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=created[0].name)
+
+
+def test_blocks_are_released_when_a_column_is_missing(market, monkeypatch):
+    created = []
+
+    def create(size, create=True):
+        created.append(SharedMemory(create=create, size=size))
+        return created[-1]
+
+    monkeypatch.setattr(shared_data, "SharedMemory", create)
+    with pytest.raises(KeyError):
+        SharedMarketData(market.drop(columns="symbol"))
+    assert len(created) == 2
+    for block in created:
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=block.name)
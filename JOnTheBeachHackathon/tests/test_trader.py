@@ -0,0 +1,63 @@
+import pytest
+
+from backtest import TRADERS
+from journal import OrderJournal
+
+PRICES = {"token_1/fiat": 10.0, "token_2/fiat": 5.0, "token_1/token_2": 2.0}
+
+
+def trader(trader_type, fiat=100.0, fee=0.01):
+    balances = {"fiat": fiat, "token_1": 0.0, "token_2": 0.0}
+    trader = TRADERS[trader_type](balances, fee, journal=OrderJournal())
+    for pair, close in PRICES.items():
+        trader.update_market(pair, {"close": close})
+    return trader
+
+
+@pytest.mark.parametrize("trader_type", list(TRADERS))
+def test_atomic_batch_is_all_or_nothing(trader_type):
+    orders = [
+        {"pair": "token_1/fiat", "side": "buy", "qty": 5},
+        # Costs 101 fiat, more than is left after the first leg
+        {"pair": "token_2/fiat", "side": "buy", "qty": 20},
+    ]
+    atomic = trader(trader_type)
+    assert atomic.execute_batch(orders, "t", atomic=True) == 0
+    assert dict(atomic.balances) == {"fiat": 100.0, "token_1": 0.0, "token_2": 0.0}
+    assert len(atomic.journal) == 0
+
+    # Without atomic, the first leg fills and both are submitted
+    partial = trader(trader_type)
+    assert partial.execute_batch(orders, "t") == 1
+    assert partial.balances["token_1"] == 5
+    assert len(partial.journal) == 2
+
+
+@pytest.mark.parametrize("trader_type", list(TRADERS))
+def test_atomic_legs_are_checked_in_sequence(trader_type):
+    # The second leg sells the token_1 bought by the first
+    orders = [
+        {"pair": "token_1/fiat", "side": "buy", "qty": 5},
+        {"pair": "token_1/token_2", "side": "sell", "qty": 5},
+    ]
+    atomic = trader(trader_type)
+    assert atomic.execute_batch(orders, "t", atomic=True) == 2
+    assert atomic.balances["fiat"] == pytest.approx(100 - 50 * 1.01)
+    assert atomic.balances["token_1"] == 0
+    assert atomic.balances["token_2"] == pytest.approx(10 * 0.99)
+    assert len(atomic.journal) == 2
+
+
+@pytest.mark.parametrize("trader_type", list(TRADERS))
+def test_incremental_equity_matches_a_full_valuation(trader_type):
+    traded = trader(trader_type, fiat=1000.0)
+    for order in [
+        {"pair": "token_1/fiat", "side": "buy", "qty": 20},
+        {"pair": "token_2/fiat", "side": "buy", "qty": 30},
+        {"pair": "token_1/token_2", "side": "sell", "qty": 5},
+    ]:
+        traded.execute(order)
+    traded.update_market("token_1/fiat", {"close": 12.5})
+    traded.update_market("token_2/fiat", {"close": 4.0})
+    assert traded.trade_count == 3
+    assert traded.equity == pytest.approx(traded.calculate_portfolio_value())
@@ -0,0 +1,37 @@
+import numpy as np
+
+from vectorized import BUY, SELL, fill_orders
+
+
+def kernel_inputs():
+    rng = np.random.default_rng(3)
+    n_ticks = 300
+    sides = rng.choice(np.array([0, 0, 0, BUY, SELL], dtype=np.int8), (n_ticks, 3))
+    prices = rng.uniform(0.5, 2.0, (n_ticks, 3))
+    return (
+        np.flatnonzero(sides.any(axis=1)),
+        sides,
+        prices,
+        np.array([1, 1, 2]),
+        np.array([2, 0, 0]),
+        np.array([0.5, 0.1, 0.1]),
+        np.array([0.0, 1.0, 1.0]),
+        np.array([0.0, 0.5, 0.5]),
+        np.array([True, False, True]),
+        np.array([True, False, False]),
+        0.03,
+        np.array([1000.0, 100.0, 100.0]),
+    )
+
+
+def test_fill_kernel_compiles_to_the_python_results():
+    # Without numba, njit leaves the kernel as is and both runs are Python
+    python = getattr(fill_orders, "py_func", fill_orders)
+    inputs = kernel_inputs()
+    expected = python(*inputs)
+    order_side, balance_ticks = expected[2], expected[4]
+    assert (order_side == BUY).any() and (order_side == SELL).any()
+    assert (balance_ticks >= 0).all()
+
+    for result, values in zip(fill_orders(*inputs), expected):
+        np.testing.assert_array_equal(result, values)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import walk_forward
+from walk_forward import walk_forward_windows
+
+
+def test_windows_tile_the_test_ticks():
+    assert list(walk_forward_windows(10, 4, 2)) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+    assert list(walk_forward_windows(10, 4, 3, step=2, anchored=True)) == [
+        (0, 4, 7),
+        (0, 6, 9),
+    ]
+    with pytest.raises(ValueError):
+        list(walk_forward_windows(10, 4, 0))
+
+
+@pytest.mark.parametrize("completion", [list, lambda keys: keys[::-1]])
+def test_best_config_does_not_depend_on_completion_order(monkeypatch, completion):
+    # Config 0 scores NaN, configs 1 and 2 tie, config 3 is worse
+    scores = [np.nan, 2.0, 2.0, 1.0]
+
+    def run_parallel(jobs, *args):
+        for key in completion(list(jobs)):
+            if isinstance(key, tuple):
+                yield key, {"Score": scores[key[1]]}
+            else:
+                yield key, {"Score": 0.0, "Final Balance": {"fiat": 1.0}}
+
+    monkeypatch.setattr(walk_forward, "run_parallel", run_parallel)
+    data = pd.DataFrame({"timestamp": np.repeat(np.arange(10), 2)})
+    configs = [{"window": window} for window in (5, 10, 20, 40)]
+    folds, _ = walk_forward.walk_forward(None, configs, data, 0.0, {}, 4, 2)
+
+    assert folds["window"].tolist() == [10, 10, 10]
+    assert folds["in_sample_Score"].tolist() == [2.0, 2.0, 2.0]
@@ -1,7 +1,118 @@
-class Trader:
+from collections.abc import MutableMapping
+import numpy as np
+
+
+class EquityCurve:
+    """Portfolio value sampled once per timestamp, backed by a float64 array.
+
+    Capacity doubles when full, so appending a sample is amortised O(1).
+    """
+
+    def __init__(self, capacity=1024):
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        if self._size == len(self._values):
+            values = np.empty(max(1, 2 * len(self._values)), dtype=np.float64)
+            values[: self._size] = self._values[: self._size]
+            self._values = values
+        self._values[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        while self._size + len(values) > len(self._values):
+            grown = np.empty(max(1, 2 * len(self._values)), dtype=np.float64)
+            grown[: self._size] = self._values[: self._size]
+            self._values = grown
+        self._values[self._size : self._size + len(values)] = values
+        self._size += len(values)
+
+    @property
+    def values(self):
+        """View of the recorded samples (no copy)"""
+        return self._values[: self._size]
+
+
+def initial_portfolio_value(balances, first_prices) -> float:
+    """Value of the initial ``balances`` at the first price of each pair"""
+    value = balances["fiat"]
+    if first_prices.get("token_1/fiat") is not None and balances["token_1"] > 0:
+        value += balances["token_1"] * first_prices["token_1/fiat"]
+    if first_prices.get("token_2/fiat") is not None and balances["token_2"] > 0:
+        value += balances["token_2"] * first_prices["token_2/fiat"]
+    return value
+
+
+class BatchExecution:
+    """Batched order execution shared by ``Trader`` and ``CompactTrader``.
+
+    Subclasses provide ``execute`` and two lookups: ``_balance_copy``, a
+    scratch copy of the balances, and ``_pair_terms``, a pair's price with
+    the keys of its base and quote balances.
+    """
+
+    __slots__ = ()
+
+    def execute_batch(self, orders, timestamp=None, atomic=False):
+        """Execute one tick's orders in order and record them in the journal.
+
+        With ``atomic`` the orders are first checked as a sequence against
+        the current prices and balances; if any of them would be rejected,
+        none is executed or recorded, so a multi-leg arbitrage is placed
+        whole or not at all. Otherwise every order is recorded, executed or
+        not, as a submission.
+
+        Returns:
+            Number of orders executed
+        """
+        if atomic and not self._fillable(orders):
+            return 0
+        trade_count = self.trade_count
+        for order in orders:
+            self.execute(order)
+        if self.journal is not None:
+            for order in orders:
+                self.journal.append(timestamp, order["pair"], order["side"], order["qty"])
+        return self.trade_count - trade_count
+
+    def _fillable(self, orders):
+        """Whether ``execute`` would fill every one of ``orders`` in turn"""
+        balances = self._balance_copy()
+        for order in orders:
+            terms = self._pair_terms(order["pair"])
+            if terms is None:
+                return False
+            price, base, quote = terms
+            side = order["side"]
+            qty = float(order["qty"])
+
+            if side == "buy":
+                base_cost = qty * price
+                total_cost = base_cost + base_cost * self.fee
+                if balances[quote] < total_cost:
+                    return False
+                balances[quote] -= total_cost
+                balances[base] += qty
+            elif side == "sell":
+                if balances[base] < qty:
+                    return False
+                base_proceeds = qty * price
+                balances[quote] += base_proceeds - base_proceeds * self.fee
+                balances[base] -= qty
+            else:
+                return False
+        return True
+
+
+class Trader(BatchExecution):
     """Trader supporting multiple trading pairs and currencies."""
 
-    def __init__(self, balances, fee):
+    def __init__(self, balances, fee, equity_curve=None, journal=None):
         # Initialize balances for each currency
         self.balances = balances
 
@@ -30,8 +141,14 @@ class Trader:
             "SOL/BTC": False,
         }
 
-        # Track portfolio value history
-        self.equity_history = 0.0
+        # Fiat value of one unit of each currency under the current prices
+        self.unit_values = {"fiat": 1.0, "token_1": 0.0, "token_2": 0.0}
+
+        # Portfolio value, kept up to date from balance and price deltas
+        self.equity = self.calculate_portfolio_value()
+
+        # Track portfolio value history, one sample per timestamp
+        self.equity_curve = EquityCurve() if equity_curve is None else equity_curve
         self.turnover = 0.0
         self.trade_count = 0
         self.total_fees_paid = 0.0  # Track total fees paid
@@ -39,6 +156,9 @@ class Trader:
         # Trading fee
         self.fee = fee
 
+        # OrderJournal that execute_batch records the orders into
+        self.journal = journal
+
     def update_market(self, pair, price_data):
         """Update market prices for a specific trading pair"""
         # Store the updated price
@@ -49,9 +169,39 @@ class Trader:
             self.first_prices[pair] = price_data["close"]
             self.first_update[pair] = True
 
-        # Calculate total portfolio value (in fiat)
-        equity = self.calculate_portfolio_value()
-        self.equity_history.append(equity)
+        # Revalue the token holdings at the new prices
+        token_1_value = self.unit_values["token_1"]
+        token_2_value = self.unit_values["token_2"]
+        self._update_unit_values()
+        self.equity += self.balances["token_1"] * (
+            self.unit_values["token_1"] - token_1_value
+        )
+        self.equity += self.balances["token_2"] * (
+            self.unit_values["token_2"] - token_2_value
+        )
+
+    def _update_unit_values(self):
+        """Refresh the fiat value of token_1 and token_2 from the last prices"""
+        token_1_price = self.prices["token_1/fiat"]
+        token_2_price = self.prices["token_2/fiat"]
+        cross_price = self.prices["token_1/token_2"]
+
+        self.unit_values["token_1"] = token_1_price if token_1_price is not None else 0.0
+        if token_2_price is not None:
+            self.unit_values["token_2"] = token_2_price
+        # If token_2/fiat price not available, value token_2 through token_1
+        elif token_1_price is not None and cross_price is not None:
+            self.unit_values["token_2"] = token_1_price / cross_price
+        else:
+            self.unit_values["token_2"] = 0.0
+
+    def mark_to_market(self):
+        """Record the current portfolio value as the next equity sample"""
+        self.equity_curve.append(self.equity)
+
+    @property
+    def equity_history(self):
+        return self.equity_curve.values
 
     def calculate_portfolio_value(self):
         """Calculate total portfolio value in fiat currency"""
@@ -106,6 +256,10 @@ class Trader:
                 # Add base currency (e.g., token_1)
                 self.balances[base] += qty
 
+                self.equity += (
+                    qty * self.unit_values[base] - total_cost * self.unit_values[quote]
+                )
+
                 # Track turnover and fees
                 self.turnover += total_cost
                 self.total_fees_paid += fee_amount
@@ -125,6 +279,10 @@ class Trader:
                 # Deduct base currency (e.g., token_1)
                 self.balances[base] -= qty
 
+                self.equity += (
+                    net_proceeds * self.unit_values[quote] - qty * self.unit_values[base]
+                )
+
                 # Track turnover and fees
                 self.turnover += base_proceeds
                 self.total_fees_paid += fee_amount
@@ -133,3 +291,263 @@ class Trader:
         # Count successful trades
         if executed:
             self.trade_count += 1
+
+    def _balance_copy(self):
+        return dict(self.balances)
+
+    def _pair_terms(self, pair):
+        """(price, base, quote) of ``pair``, None if it has no price"""
+        price = self.prices.get(pair)
+        if price is None:
+            return None
+        base, quote = pair.split("/")
+        return price, base, quote
+
+
+class BalanceView(MutableMapping):
+    """Live ``{currency: amount}`` view over the balances of a CompactTrader.
+
+    Strategies read (and may write) balances through it exactly as through
+    the plain dict given to ``Trader``.
+    """
+
+    __slots__ = ("_ids", "_values")
+
+    def __init__(self, ids, values):
+        self._ids = ids
+        self._values = values
+
+    def __getitem__(self, currency):
+        return self._values[self._ids[currency]]
+
+    def __setitem__(self, currency, amount):
+        self._values[self._ids[currency]] = amount
+
+    def __delitem__(self, currency):
+        raise TypeError("Currencies cannot be removed from a trader")
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CompactTrader(BatchExecution):
+    """Drop-in ``Trader`` with pairs and currencies interned to integer ids.
+
+    Prices, balances and unit values live in small fixed-size lists indexed
+    by those ids, and each pair's base and quote ids are resolved once, so
+    ``execute`` and ``update_market`` do index arithmetic instead of
+    ``pair.split("/")`` and string-keyed dict lookups. ``balances`` is a
+    live BalanceView; the dict given at construction is only read, use
+    ``sync_balances`` to write the final balances back to it.
+    """
+
+    __slots__ = (
+        "_currency_ids",
+        "_pair_ids",
+        "_base",
+        "_quote",
+        "_balances",
+        "_prices",
+        "_first_prices",
+        "_unit_values",
+        "balances",
+        "equity",
+        "equity_curve",
+        "turnover",
+        "trade_count",
+        "total_fees_paid",
+        "fee",
+        "journal",
+    )
+
+    CURRENCIES = ("fiat", "token_1", "token_2")
+    PAIRS = ("token_1/fiat", "token_2/fiat", "token_1/token_2")
+
+    # Ids of the currencies and pairs the portfolio is valued with
+    FIAT, TOKEN_1, TOKEN_2 = 0, 1, 2
+    TOKEN_1_FIAT, TOKEN_2_FIAT, TOKEN_1_TOKEN_2 = 0, 1, 2
+
+    def __init__(self, balances, fee, equity_curve=None, journal=None):
+        self._currency_ids = {}
+        self._balances = []
+        self._unit_values = []
+        for currency in (*self.CURRENCIES, *balances):
+            self._add_currency(currency)
+        for currency, amount in balances.items():
+            self._balances[self._currency_ids[currency]] = amount
+        self._unit_values[self.FIAT] = 1.0
+        self.balances = BalanceView(self._currency_ids, self._balances)
+
+        self._pair_ids = {}
+        self._base = []
+        self._quote = []
+        self._prices = []
+        self._first_prices = []
+        for pair in self.PAIRS:
+            self._add_pair(pair)
+
+        self.equity = self.calculate_portfolio_value()
+        self.equity_curve = EquityCurve() if equity_curve is None else equity_curve
+        self.turnover = 0.0
+        self.trade_count = 0
+        self.total_fees_paid = 0.0
+        self.fee = fee
+        self.journal = journal
+
+    def _add_currency(self, currency):
+        if currency not in self._currency_ids:
+            self._currency_ids[currency] = len(self._balances)
+            self._balances.append(0.0)
+            self._unit_values.append(0.0)
+        return self._currency_ids[currency]
+
+    def _add_pair(self, pair):
+        """Intern a pair seen for the first time, returns its id"""
+        base, quote = pair.split("/")
+        self._pair_ids[pair] = len(self._prices)
+        self._base.append(self._add_currency(base))
+        self._quote.append(self._add_currency(quote))
+        self._prices.append(None)
+        self._first_prices.append(None)
+        return self._pair_ids[pair]
+
+    @property
+    def prices(self):
+        return dict(zip(self._pair_ids, self._prices))
+
+    @property
+    def first_prices(self):
+        return dict(zip(self._pair_ids, self._first_prices))
+
+    @property
+    def unit_values(self):
+        return dict(zip(self._currency_ids, self._unit_values))
+
+    def update_market(self, pair, price_data):
+        """Update market prices for a specific trading pair"""
+        pair_id = self._pair_ids.get(pair)
+        if pair_id is None:
+            pair_id = self._add_pair(pair)
+
+        price = price_data["close"]
+        self._prices[pair_id] = price
+        if self._first_prices[pair_id] is None:
+            self._first_prices[pair_id] = price
+
+        # Revalue the token holdings at the new prices
+        unit_values = self._unit_values
+        token_1_value = unit_values[self.TOKEN_1]
+        token_2_value = unit_values[self.TOKEN_2]
+        self._update_unit_values()
+        self.equity += self._balances[self.TOKEN_1] * (
+            unit_values[self.TOKEN_1] - token_1_value
+        )
+        self.equity += self._balances[self.TOKEN_2] * (
+            unit_values[self.TOKEN_2] - token_2_value
+        )
+
+    def _update_unit_values(self):
+        """Refresh the fiat value of token_1 and token_2 from the last prices"""
+        token_1_price = self._prices[self.TOKEN_1_FIAT]
+        token_2_price = self._prices[self.TOKEN_2_FIAT]
+        cross_price = self._prices[self.TOKEN_1_TOKEN_2]
+
+        unit_values = self._unit_values
+        unit_values[self.TOKEN_1] = token_1_price if token_1_price is not None else 0.0
+        if token_2_price is not None:
+            unit_values[self.TOKEN_2] = token_2_price
+        # If token_2/fiat price not available, value token_2 through token_1
+        elif token_1_price is not None and cross_price is not None:
+            unit_values[self.TOKEN_2] = token_1_price / cross_price
+        else:
+            unit_values[self.TOKEN_2] = 0.0
+
+    def mark_to_market(self):
+        """Record the current portfolio value as the next equity sample"""
+        self.equity_curve.append(self.equity)
+
+    @property
+    def equity_history(self):
+        return self.equity_curve.values
+
+    def sync_balances(self, balances):
+        """Write the current balances into the ``balances`` dict"""
+        balances.update(self.balances)
+
+    def calculate_portfolio_value(self):
+        """Calculate total portfolio value in fiat currency"""
+        balances = self._balances
+        token_1_price = self._prices[self.TOKEN_1_FIAT]
+        token_2_price = self._prices[self.TOKEN_2_FIAT]
+        cross_price = self._prices[self.TOKEN_1_TOKEN_2]
+
+        value = balances[self.FIAT]
+        if token_1_price is not None:
+            value += balances[self.TOKEN_1] * token_1_price
+        if token_2_price is not None:
+            value += balances[self.TOKEN_2] * token_2_price
+        elif token_1_price is not None and cross_price is not None:
+            value += balances[self.TOKEN_2] / cross_price * token_1_price
+        return value
+
+    def execute(self, order):
+        """Execute a trading order across any supported pair"""
+        pair_id = self._pair_ids[order["pair"]]
+        side = order["side"]
+        qty = float(order["qty"])
+
+        price = self._prices[pair_id]
+        if price is None:
+            return  # Can't trade without a price
+
+        base = self._base[pair_id]
+        quote = self._quote[pair_id]
+        balances = self._balances
+
+        if side == "buy":
+            base_cost = qty * price
+            fee_amount = base_cost * self.fee
+            total_cost = base_cost + fee_amount
+            if balances[quote] < total_cost:
+                return
+            balances[quote] -= total_cost
+            balances[base] += qty
+            self.equity += (
+                qty * self._unit_values[base] - total_cost * self._unit_values[quote]
+            )
+            self.turnover += total_cost
+
+        elif side == "sell":
+            if balances[base] < qty:
+                return
+            base_proceeds = qty * price
+            fee_amount = base_proceeds * self.fee
+            net_proceeds = base_proceeds - fee_amount
+            balances[quote] += net_proceeds
+            balances[base] -= qty
+            self.equity += (
+                net_proceeds * self._unit_values[quote] - qty * self._unit_values[base]
+            )
+            self.turnover += base_proceeds
+
+        else:
+            return
+
+        self.total_fees_paid += fee_amount
+        self.trade_count += 1
+
+    def _balance_copy(self):
+        return self._balances.copy()
+
+    def _pair_terms(self, pair):
+        """(price, base id, quote id) of ``pair``, None if it has no price"""
+        pair_id = self._pair_ids.get(pair)
+        if pair_id is None or self._prices[pair_id] is None:
+            return None
+        return self._prices[pair_id], self._base[pair_id], self._quote[pair_id]
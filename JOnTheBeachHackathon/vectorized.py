@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from journal import OrderJournal, random_ids
+from trader import CompactTrader, initial_portfolio_value
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, without it the kernel runs as plain Python
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+CURRENCIES = CompactTrader.CURRENCIES
+
+BUY, SELL = 1, -1
+
+
+def rolling_sum(values, window):
+    """Sum of the last ``window`` values (fewer at the start) at each position"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.empty(len(values))
+    head = min(window - 1, len(values))
+    result[:head] = np.cumsum(values[:head])
+    if len(values) >= window:
+        result[head:] = sliding_window_view(values, window).sum(axis=1)
+    return result
+
+
+def rolling_mean(values, window):
+    """Mean of the last ``window`` values, like ``indicators.SMA``"""
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return rolling_sum(values, window) / counts
+
+
+def rolling_std(values, window):
+    """Population std of the last ``window`` values, like ``indicators.RollingStd``"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.empty(len(values))
+    for i in range(min(window - 1, len(values))):
+        result[i] = values[: i + 1].std()
+    if len(values) >= window:
+        result[window - 1 :] = sliding_window_view(values, window).std(axis=1)
+    return result
+
+
+def rsi(close, window):
+    """``indicators.RSI`` (simple smoothing) over a whole price series"""
+    changes = np.diff(close)
+    avg_gain = rolling_mean(np.maximum(changes, 0), window)
+    avg_loss = rolling_mean(np.maximum(-changes, 0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    return np.concatenate(([np.nan], values))
+
+
+def obv(close, volume, window):
+    """``indicators.OBV`` over a whole price and volume series"""
+    signed = np.sign(np.diff(close)) * volume[1:]
+    return np.concatenate(([0.0], rolling_sum(signed, window)))
+
+
+def pivot_market_data(combined_data, fields=("open", "high", "low", "close", "volume")):
+    """Pivot market data into ``(timestamp, pair)`` grids.
+
+    Returns:
+        dict with ``timestamps``, ``pairs``, the ``present`` mask and one
+        float64 grid per field, NaN where a pair has no row
+    """
+    timestamps, ts_index = np.unique(
+        combined_data["timestamp"].to_numpy(), return_inverse=True
+    )
+    pairs, pair_index = np.unique(
+        combined_data["symbol"].to_numpy(), return_inverse=True
+    )
+    shape = (len(timestamps), len(pairs))
+    market = {"timestamps": timestamps, "pairs": pairs.tolist()}
+    market["present"] = np.zeros(shape, dtype=bool)
+    market["present"][ts_index, pair_index] = True
+    for field in fields:
+        grid = np.full(shape, np.nan)
+        grid[ts_index, pair_index] = combined_data[field].to_numpy(np.float64)
+        market[field] = grid
+    return market
+
+
+def pair_series(market, pair, field):
+    """Rows of ``field`` at which ``pair`` is present, and their tick indices"""
+    column = market["pairs"].index(pair)
+    ticks = np.flatnonzero(market["present"][:, column])
+    return market[field][ticks, column], ticks
+
+
+@njit(cache=True)
+def fill_orders(
+    ticks,
+    sides,
+    prices,
+    base,
+    quote,
+    fraction,
+    buy_min_qty,
+    sell_min_qty,
+    sell_cap,
+    exclusive,
+    fee,
+    balances,
+):
+    """Sequential order sizing and fill simulation.
+
+    For every tick of ``ticks`` the order of each signalled pair is sized
+    from the balances at the start of the tick, in column order; after an
+    order on an ``exclusive`` pair the later pairs are skipped. Orders are
+    then executed with ``Trader.execute`` semantics (fees, and a rejection
+    when the balance is short), but recorded either way, as ``run_backtest``
+    records every submitted order.
+
+    Returns:
+        ``(order_tick, order_pair, order_side, order_qty, balance_ticks)``:
+        the submitted orders and the balances after each of ``ticks``
+    """
+    n_pairs = sides.shape[1]
+    max_orders = len(ticks) * n_pairs
+    order_tick = np.empty(max_orders, dtype=np.int64)
+    order_pair = np.empty(max_orders, dtype=np.int64)
+    order_side = np.empty(max_orders, dtype=np.int8)
+    order_qty = np.empty(max_orders, dtype=np.float64)
+    balance_ticks = np.empty((len(ticks), len(balances)), dtype=np.float64)
+    balances = balances.copy()
+    n = 0
+
+    for k in range(len(ticks)):
+        t = ticks[k]
+        first = n
+
+        # Size the orders from the balances at the start of the tick
+        for j in range(n_pairs):
+            side = sides[t, j]
+            if side == 0:
+                continue
+            price = prices[t, j]
+            if side == BUY:
+                qty = max(buy_min_qty[j], balances[quote[j]] * fraction[j] / price)
+                if balances[quote[j]] < qty * price * (1 + fee):
+                    continue
+            else:
+                qty = max(sell_min_qty[j], balances[base[j]] * fraction[j])
+                if sell_cap[j]:
+                    qty = min(qty, balances[base[j]])
+                if not qty > 0:
+                    continue
+            order_tick[n] = t
+            order_pair[n] = j
+            order_side[n] = side
+            order_qty[n] = qty
+            n += 1
+            if exclusive[j]:
+                break
+
+        # Execute them in order
+        for i in range(first, n):
+            j = order_pair[i]
+            qty = order_qty[i]
+            price = prices[t, j]
+            if order_side[i] == BUY:
+                base_cost = qty * price
+                total_cost = base_cost + base_cost * fee
+                if balances[quote[j]] >= total_cost:
+                    balances[quote[j]] -= total_cost
+                    balances[base[j]] += qty
+            elif balances[base[j]] >= qty:
+                base_proceeds = qty * price
+                balances[quote[j]] += base_proceeds - base_proceeds * fee
+                balances[base[j]] -= qty
+
+        balance_ticks[k] = balances
+
+    return order_tick[:n], order_pair[:n], order_side[:n], order_qty[:n], balance_ticks
+
+
+def equity_values(market, balance_history):
+    """Mark-to-market value of ``balance_history`` (ticks x currencies)"""
+    close = pd.DataFrame(market["close"], columns=market["pairs"]).ffill()
+
+    def price(pair):
+        if pair in close:
+            return close[pair].to_numpy()
+        return np.full(len(close), np.nan)
+
+    token_1 = price("token_1/fiat")
+    token_2 = price("token_2/fiat")
+    token_2 = np.where(np.isnan(token_2), token_1 / price("token_1/token_2"), token_2)
+    return (
+        balance_history[:, 0]
+        + balance_history[:, 1] * np.nan_to_num(token_1)
+        + balance_history[:, 2] * np.nan_to_num(token_2)
+    )
+
+
+def run_vectorized(
+    combined_data,
+    fee,
+    balances,
+    strategy,
+    journal=None,
+    equity_curve=None,
+    id_generator=random_ids,
+):
+    """Backtest a strategy that exposes ``signals`` over whole arrays.
+
+    ``strategy.signals(market, fee)`` receives the ``pivot_market_data``
+    grids and returns a dict with ``pairs`` (the pairs it trades, in the
+    order they are considered at each tick), ``sides`` (an int8 ticks x
+    pairs grid of BUY / SELL / 0) and the per-pair sizing rules
+    ``fraction``, ``buy_min_qty``, ``sell_min_qty``, ``sell_cap`` and
+    ``exclusive``, see ``fill_orders``. The orders are then filled by the
+    compiled kernel, and ``balances`` is updated with the final balances.
+
+    Returns:
+        The ``id,timestamp,pair,side,qty`` order log
+    """
+    market = pivot_market_data(combined_data)
+    signals = strategy.signals(market, fee)
+    pairs = signals["pairs"]
+
+    columns = [market["pairs"].index(pair) for pair in pairs]
+    close = pd.DataFrame(market["close"][:, columns]).ffill().to_numpy()
+    ids = {currency: i for i, currency in enumerate(CURRENCIES)}
+    start_balances = np.array([balances[c] for c in CURRENCIES], dtype=np.float64)
+
+    sides = np.ascontiguousarray(signals["sides"], dtype=np.int8)
+    ticks = np.flatnonzero(sides.any(axis=1))
+    order_tick, order_pair, order_side, order_qty, balance_ticks = fill_orders(
+        ticks,
+        sides,
+        close,
+        np.array([ids[pair.split("/")[0]] for pair in pairs]),
+        np.array([ids[pair.split("/")[1]] for pair in pairs]),
+        np.asarray(signals["fraction"], dtype=np.float64),
+        np.asarray(signals["buy_min_qty"], dtype=np.float64),
+        np.asarray(signals["sell_min_qty"], dtype=np.float64),
+        np.asarray(signals["sell_cap"], dtype=np.bool_),
+        np.asarray(signals["exclusive"], dtype=np.bool_),
+        fee,
+        start_balances,
+    )
+
+    if journal is None:
+        journal = OrderJournal()
+    journal.extend(
+        market["timestamps"][order_tick],
+        np.array(pairs, dtype=object)[order_pair],
+        np.where(order_side == BUY, "buy", "sell").astype(object),
+        order_qty,
+    )
+
+    # Balances at every tick: those after the last signalled tick so far
+    after = np.searchsorted(ticks, np.arange(len(market["timestamps"])), side="right")
+    balance_history = np.vstack((start_balances, balance_ticks))[after]
+
+    if equity_curve is not None:
+        first_prices = {
+            pair: market["close"][market["present"][:, p].argmax(), p]
+            for p, pair in enumerate(market["pairs"])
+            if market["present"][:, p].any()
+        }
+        equity_curve.append(initial_portfolio_value(balances, first_prices))
+        equity_curve.extend(equity_values(market, balance_history))
+
+    final = balance_history[-1] if len(balance_history) else start_balances
+    balances.update(zip(CURRENCIES, final.tolist()))
+    return journal.to_frame(id_generator)
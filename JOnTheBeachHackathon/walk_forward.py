@@ -0,0 +1,183 @@
+import argparse
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from backtest import load_hyperparameters
+from data_cache import load_market_data
+from sweep import (
+    STRATEGY9_GRID,
+    flatten_metrics,
+    grid_configs,
+    random_configs,
+    run_parallel,
+)
+
+
+def walk_forward_windows(n_ticks, train_ticks, test_ticks, step=None, anchored=False):
+    """Yield ``(train_start, test_start, test_end)`` tick positions.
+
+    Each test window directly follows its train window and the windows
+    advance by ``step`` ticks (``test_ticks`` by default, so the test
+    windows tile the timeline). With ``anchored`` every train window starts
+    at the first tick instead of rolling forward.
+    """
+    step = test_ticks if step is None else step
+    if min(train_ticks, test_ticks, step) <= 0:
+        raise ValueError("train_ticks, test_ticks and step must be positive")
+
+    test_start = train_ticks
+    while test_start + test_ticks <= n_ticks:
+        train_start = 0 if anchored else test_start - train_ticks
+        yield train_start, test_start, test_start + test_ticks
+        test_start += step
+
+
+def walk_forward(
+    strategy_cls,
+    configs,
+    combined_data,
+    fee,
+    balances,
+    train_ticks,
+    test_ticks,
+    step=None,
+    anchored=False,
+    max_workers=None,
+    engine="numpy",
+    rank_by="Score",
+):
+    """Walk-forward optimisation of ``strategy_cls`` over ``combined_data``.
+
+    The timeline is split into train/test windows (see
+    ``walk_forward_windows``). Every config is backtested on every train
+    window, the best one by ``rank_by`` is then backtested on the test
+    window that follows. All the backtests of a phase run across one
+    process pool, so the folds are optimised concurrently.
+
+    Each backtest starts from ``balances`` and a fresh strategy instance,
+    so the strategy warms up again at the start of every window.
+
+    Returns:
+        ``(folds, summary)``: a DataFrame with one row per fold (its window
+        bounds, chosen params, in-sample ``rank_by`` and out-of-sample
+        metrics), and a DataFrame with the mean, std, min and max of the
+        out-of-sample metrics across folds
+    """
+    if not combined_data["timestamp"].is_monotonic_increasing:
+        combined_data = combined_data.sort_values(
+            "timestamp", kind="stable", ignore_index=True
+        )
+    configs = list(configs)
+
+    # Row range of every tick, the windows are cut on timestamp boundaries
+    timestamps = combined_data["timestamp"].to_numpy()
+    tick_starts = np.flatnonzero(np.r_[True, timestamps[1:] != timestamps[:-1]])
+    tick_starts = np.append(tick_starts, len(timestamps))
+    windows = list(
+        walk_forward_windows(
+            len(tick_starts) - 1, train_ticks, test_ticks, step, anchored
+        )
+    )
+    if not windows:
+        raise ValueError(
+            f"{len(tick_starts) - 1} ticks are too few for a "
+            f"{train_ticks} + {test_ticks} tick window"
+        )
+
+    def rows(start, stop):
+        return int(tick_starts[start]), int(tick_starts[stop])
+
+    # Optimise every fold in-sample
+    train_jobs = {
+        (fold, i): (strategy_cls, params, rows(train_start, test_start))
+        for fold, (train_start, test_start, _) in enumerate(windows)
+        for i, params in enumerate(configs)
+    }
+    scores = {}
+    for key, metrics in run_parallel(
+        train_jobs, combined_data, fee, balances, max_workers, engine
+    ):
+        scores[key] = metrics[rank_by]
+
+    def rank(fold, i):
+        # NaN ranks last and ties go to the first config, so the choice does
+        # not depend on the order the backtests complete in
+        score = scores[fold, i]
+        return (-np.inf if np.isnan(score) else score, -i)
+
+    best = {}
+    for fold in range(len(windows)):
+        i = max(range(len(configs)), key=lambda i: rank(fold, i))
+        best[fold] = (i, scores[fold, i])
+
+    # Evaluate each fold's best config out-of-sample
+    test_jobs = {
+        fold: (strategy_cls, configs[best[fold][0]], rows(test_start, test_end))
+        for fold, (_, test_start, test_end) in enumerate(windows)
+    }
+    fold_rows = {}
+    for fold, metrics in run_parallel(
+        test_jobs, combined_data, fee, balances, max_workers, engine
+    ):
+        train_start, test_start, test_end = windows[fold]
+        i, in_sample = best[fold]
+        metric_names = list(flatten_metrics(metrics))
+        fold_rows[fold] = {
+            "train_from": timestamps[tick_starts[train_start]],
+            "test_from": timestamps[tick_starts[test_start]],
+            "test_to": timestamps[tick_starts[test_end] - 1],
+            **configs[i],
+            f"in_sample_{rank_by}": in_sample,
+            **flatten_metrics(metrics),
+        }
+
+    folds = pd.DataFrame([fold_rows[fold] for fold in sorted(fold_rows)])
+    folds.index.name = "fold"
+    out_of_sample = folds[metric_names].select_dtypes("number")
+    summary = out_of_sample.agg(["mean", "std", "min", "max"])
+    return folds, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward analysis of strategy9")
+    parser.add_argument("--data", default="kaggle/input/config/test.csv")
+    parser.add_argument(
+        "--hyperparameters", default="kaggle/input/config/hyperparameters.json"
+    )
+    parser.add_argument("--train", type=int, default=480, help="Ticks per train window")
+    parser.add_argument("--test", type=int, default=240, help="Ticks per test window")
+    parser.add_argument("--step", type=int, default=None)
+    parser.add_argument("--anchored", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--random", type=int, default=0, help="Random configs to sample instead of the full grid"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    strategy_module = importlib.import_module("strategy9")
+    fee, balances = load_hyperparameters(args.hyperparameters)
+    combined_data = load_market_data(args.data)
+
+    if args.random:
+        configs = random_configs(STRATEGY9_GRID, args.random, args.seed)
+    else:
+        configs = grid_configs(STRATEGY9_GRID)
+
+    folds, summary = walk_forward(
+        strategy_module.DefaultStrategy,
+        configs,
+        combined_data,
+        fee,
+        balances,
+        args.train,
+        args.test,
+        step=args.step,
+        anchored=args.anchored,
+        max_workers=args.workers,
+    )
+    print(folds.to_string())
+    print()
+    print(summary.to_string())